@@ -0,0 +1,98 @@
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Кодировка из Accept-Encoding и суффикс сжатой копии файла.
+# Порядок — предпочтение при выборе.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+# Уровни для ответов на лету: заметно быстрее максимальных почти при той
+# же степени сжатия. Статику build_static жмёт максимальными.
+RESPONSE_LEVELS = {'br': 5, 'gzip': 6}
+STATIC_LEVELS = {'br': 11, 'gzip': 9}
+# Типы, которые ещё не сжаты; картинки, архивы и шрифты уже сжаты.
+COMPRESSIBLE_TYPES = {
+    'application/javascript', 'application/json', 'application/x-ndjson',
+    'application/xml', 'image/svg+xml', 'image/x-icon',
+    'image/vnd.microsoft.icon',
+}
+
+
+def available_encodings():
+    return [
+        encoding for encoding, _ in ENCODINGS
+        if encoding != 'br' or brotli is not None
+    ]
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, которые клиент принимает (q > 0)."""
+    accepted = set()
+    for item in header.split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+        name, _, value = params.strip().partition('=')
+        if name.strip() == 'q':
+            try:
+                quality = float(value)
+            except ValueError:
+                quality = 0.0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def negotiate(header):
+    """Лучшая доступная кодировка, которую принимает клиент, или None."""
+    accepted = accepted_encodings(header)
+    for encoding in available_encodings():
+        if encoding in accepted:
+            return encoding
+    return None
+
+
+def compressible(content_type):
+    media_type = content_type.split(';')[0].strip().lower()
+    return (
+        media_type.startswith('text/')
+        or media_type.endswith(('+xml', '+json'))
+        or media_type in COMPRESSIBLE_TYPES
+    )
+
+
+def compress(encoding, data, levels=RESPONSE_LEVELS):
+    if encoding == 'br':
+        return brotli.compress(data, quality=levels['br'])
+    # mtime=0: одинаковые данные дают одинаковый архив.
+    return gzip.compress(data, compresslevel=levels['gzip'], mtime=0)
+
+
+class StreamCompressor:
+    """Сжимает поток кусками: compress() и finish() возвращают байты."""
+
+    def __init__(self, encoding, levels=RESPONSE_LEVELS):
+        if encoding == 'br':
+            stream = brotli.Compressor(quality=levels['br'])
+            self._compress = stream.process
+            self._flush = stream.flush
+            self.finish = stream.finish
+        else:
+            # wbits 16 + MAX_WBITS — заголовок и хвост формата gzip.
+            stream = zlib.compressobj(
+                levels['gzip'], zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+            self._compress = stream.compress
+            self._flush = lambda: stream.flush(zlib.Z_SYNC_FLUSH)
+            self.finish = stream.flush
+
+    def compress(self, data, flush=False):
+        output = self._compress(data)
+        return output + self._flush() if flush else output
+
+
+def variant_key(key, encoding):
+    """Ключ кэша сжатой копии закэшированного ответа."""
+    return f'{key}:{encoding}'
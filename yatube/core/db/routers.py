@@ -0,0 +1,80 @@
+import random
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Эти данные нужны свежими в каждом запросе: сессию, записанную
+# при входе, реплика может ещё не получить, а очередь задач воркеры
+# разбирают конкурентно.
+PRIMARY_ONLY_APPS = {'sessions', 'tasks'}
+
+_state = threading.local()
+
+
+def replicas():
+    """Алиасы реплик, с которых можно читать."""
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+def pin_primary(pinned=True):
+    """Направляет чтения текущего потока на primary (или снимает это)."""
+    _state.pinned = pinned
+    _state.wrote = False
+
+
+def is_pinned():
+    return getattr(_state, 'pinned', False)
+
+
+def wrote_to_primary():
+    """Была ли запись в primary с последнего pin_primary()."""
+    return getattr(_state, 'wrote', False)
+
+
+class PrimaryReplicaRouter:
+    """Чтения — на случайную реплику, записи — на primary.
+
+    После первой записи в потоке чтения до конца запроса идут
+    на primary, чтобы пользователь видел то, что только что записал;
+    между запросами это состояние переносит
+    core.middleware.PrimaryStickinessMiddleware.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        aliases = replicas()
+        if (
+            not aliases
+            or is_pinned()
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(aliases)
+
+    def db_for_write(self, model, **hints):
+        instance = hints.get('instance')
+        if (
+            instance is not None
+            and instance._state.db
+            and instance._state.db not in replicas()
+        ):
+            # Например, миграции другой базы: пишем туда, откуда объект.
+            return instance._state.db
+        _state.pinned = _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики — копии primary, их заполняет sync_replica.
+        if db in replicas():
+            return False
+        return None
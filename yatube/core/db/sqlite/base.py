@@ -0,0 +1,74 @@
+import os
+
+from django.db.backends.sqlite3 import base
+
+Database = base.Database
+
+# Настройки соединения для продакшена. WAL пускает читателей параллельно
+# с писателем, synchronous=NORMAL в WAL не теряет целостность при сбое
+# процесса, busy_timeout заставляет писателя подождать блокировку, а не
+# сразу падать с «database is locked».
+PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — в килобайтах: 64 МБ страничного кэша.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """SQLite с прагмами из PRAGMAS и проверкой живости соединения.
+
+    Прагмы можно переопределить в OPTIONS['pragmas'] базы. Постоянные
+    соединения (CONN_MAX_AGE) проверяются в начале и в конце каждого
+    запроса: если файл базы подменили или соединение сломалось,
+    оно закрывается и следующий запрос откроет новое.
+    """
+
+    @property
+    def pragmas(self):
+        # settings_dict общий для соединений алиаса во всех потоках:
+        # его только читаем.
+        return {**PRAGMAS, **self.settings_dict['OPTIONS'].get('pragmas', {})}
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        # OPTIONS уходят в sqlite3.connect(), а прагмы — не его параметр.
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        self.database_inode = self._database_inode()
+        return conn
+
+    def enable_constraint_checking(self):
+        # Миграции включают проверку внешних ключей обратно; базе,
+        # где её выключили в прагмах (шарды), это не нужно.
+        if str(self.pragmas.get('foreign_keys', 'ON')).upper() != 'OFF':
+            super().enable_constraint_checking()
+
+    def _database_inode(self):
+        if self.is_in_memory_db():
+            return None
+        try:
+            return os.stat(self.settings_dict['NAME']).st_ino
+        except OSError:
+            return None
+
+    def is_usable(self):
+        try:
+            self.connection.execute('SELECT 1')
+        except Database.Error:
+            return False
+        return self._database_inode() == self.database_inode
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        if self.connection is not None and not self.is_usable():
+            self.close()
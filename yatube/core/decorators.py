@@ -0,0 +1,54 @@
+import functools
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    """View выполнил больше SQL-запросов, чем ему разрешено."""
+
+
+def query_budget(limit):
+    """Ограничивает число SQL-запросов, которое делает view.
+
+    При QUERY_BUDGET_STRICT (его включает тестовый раннер) превышение
+    бюджета роняет запрос исключением, иначе — пишется предупреждение
+    в лог. limit может быть функцией без аргументов, если бюджет
+    зависит от настроек.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            executed = []
+
+            def counter(execute, sql, params, many, context):
+                executed.append(sql)
+                return execute(sql, params, many, context)
+
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(counter))
+                response = view(request, *args, **kwargs)
+                if callable(getattr(response, 'render', None)):
+                    # Ленивый TemplateResponse тоже считаем в бюджет.
+                    response.render()
+
+            budget = limit() if callable(limit) else limit
+            if len(executed) > budget:
+                message = (
+                    f'{view.__name__}: {len(executed)} SQL-запросов '
+                    f'при бюджете {budget} ({request.get_full_path()})'
+                )
+                if settings.QUERY_BUDGET_STRICT:
+                    raise QueryBudgetExceeded(
+                        message + '\n' + '\n'.join(executed)
+                    )
+                logger.warning(message)
+            return response
+        return wrapper
+    return decorator
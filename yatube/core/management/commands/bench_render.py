@@ -0,0 +1,81 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.backends.django import DjangoTemplates
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.template_cache import CACHED_LOADERS, preload_templates
+from posts.utils import feed_posts, paginat
+
+# Режим, APP_DIRS и опции движка поверх настроек из settings.TEMPLATES.
+MODES = (
+    ('dev', True, {'debug': True}),
+    ('production', False, {'debug': False, 'loaders': CACHED_LOADERS}),
+)
+FEED_TEMPLATE = 'posts/index.html'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость рендеринга страницы главной ленты '
+        'в режиме разработки (шаблоны читаются и разбираются на каждый '
+        'рендер) и в продакшен-режиме (кэширующий загрузчик и '
+        'предзагрузка). Посты выбираются из базы один раз.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--renders', type=int, default=500,
+            help='сколько раз рендерить страницу в каждом режиме',
+        )
+
+    def handle(self, *args, **options):
+        request = RequestFactory().get(reverse('posts:index'))
+        request.user = AnonymousUser()
+        page_obj = paginat(request, feed_posts())
+        page_obj.object_list = list(page_obj.object_list)
+        context = {'page_obj': page_obj}
+
+        self.stdout.write(
+            f'{"режим":>12} {"старт, мс":>10} {"рендер, мс":>11} '
+            f'{"рендеров/с":>11}'
+        )
+        rates = {}
+        for mode, app_dirs, engine_options in MODES:
+            engine = self.engine(mode, app_dirs, engine_options)
+            started = time.perf_counter()
+            if mode == 'production':
+                preload_templates(engine)
+            # Первый рендер заполняет и кэш фрагментов {% cache %}.
+            engine.get_template(FEED_TEMPLATE).render(context, request)
+            startup = time.perf_counter() - started
+
+            renders = options['renders']
+            started = time.perf_counter()
+            for _ in range(renders):
+                engine.get_template(FEED_TEMPLATE).render(context, request)
+            elapsed = time.perf_counter() - started
+            rates[mode] = renders / elapsed
+            self.stdout.write(
+                f'{mode:>12} {startup * 1000:>10.1f} '
+                f'{elapsed / renders * 1000:>11.2f} {rates[mode]:>11.0f}'
+            )
+        self.stdout.write(
+            f'Ускорение: {rates["production"] / rates["dev"]:.1f}x'
+        )
+
+    def engine(self, name, app_dirs, engine_options):
+        config = settings.TEMPLATES[0]
+        options = {
+            key: value for key, value in config['OPTIONS'].items()
+            if key not in ('debug', 'loaders')
+        }
+        return DjangoTemplates({
+            'NAME': f'bench_{name}',
+            'DIRS': config['DIRS'],
+            'APP_DIRS': app_dirs,
+            'OPTIONS': {**options, **engine_options},
+        })
@@ -0,0 +1,187 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+from posts.bulk import insert_posts
+from posts.models import Post, User
+from posts.utils import POST_LIMIT, feed_posts
+
+# Режим, имя движка и CONN_MAX_AGE: обычный Django открывает соединение
+# на каждый запрос, продакшен-режим держит его между запросами.
+MODES = (
+    ('sqlite3', 'django.db.backends.sqlite3', 0),
+    ('production', 'core.db.sqlite', 600),
+)
+BENCH_USER = 'bench_sqlite'
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает, сколько страниц ленты в секунду читают потоки, '
+        'пока другой поток пишет посты: обычный sqlite3 против '
+        'core.db.sqlite. Работает на копии базы во временном каталоге.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='сколько потоков читают ленту',
+        )
+        parser.add_argument(
+            '--duration', type=float, default=3.0,
+            help='длительность каждой фазы, секунд',
+        )
+        parser.add_argument(
+            '--write-interval', type=float, default=0.002,
+            help='пауза писателя между постами, секунд',
+        )
+        parser.add_argument(
+            '--posts', type=int, default=5000,
+            help='дополнить копию базы до стольких постов',
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        directory = tempfile.mkdtemp(prefix='yatube-bench-')
+        try:
+            path = os.path.join(directory, 'bench.sqlite3')
+            self.copy_database(path)
+            self.stdout.write(
+                f'{"режим":>12} {"чтение/с":>10} {"под записью":>12} '
+                f'{"доля":>6} {"запись/с":>9} {"ошибки":>7}'
+            )
+            for mode, engine, max_age in MODES:
+                self.run_mode(mode, engine, max_age, path)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def copy_database(self, path):
+        """Копия текущей базы через backup API, дополненная постами."""
+        source = connections['default']
+        source.ensure_connection()
+        target = sqlite3.connect(path)
+        try:
+            source.connection.backup(target)
+        finally:
+            target.close()
+
+        alias = self.register('bench_seed', 'django.db.backends.sqlite3', 0,
+                              path)
+        missing = self.options['posts'] - Post.objects.using(alias).count()
+        if missing > 0:
+            author, _ = User.objects.using(alias).get_or_create(
+                username=BENCH_USER
+            )
+            now = timezone.now()
+            with transaction.atomic(using=alias):
+                insert_posts(
+                    (
+                        (f'Пост для замера {number}',
+                         now - timedelta(seconds=number),
+                         author.pk, None)
+                        for number in range(missing)
+                    ),
+                    using=alias,
+                )
+        self.unregister(alias)
+
+    def register(self, alias, engine, max_age, path):
+        connections.databases[alias] = {
+            'ENGINE': engine,
+            'NAME': path,
+            'CONN_MAX_AGE': max_age,
+        }
+        return alias
+
+    def unregister(self, alias):
+        connections[alias].close()
+        del connections[alias]
+        del connections.databases[alias]
+
+    def run_mode(self, mode, engine, max_age, path):
+        if engine == 'django.db.backends.sqlite3':
+            # journal_mode хранится в файле: возвращаем режим по умолчанию.
+            reset = sqlite3.connect(path)
+            try:
+                reset.execute('PRAGMA journal_mode = DELETE')
+            finally:
+                reset.close()
+        alias = self.register(f'bench_{mode}', engine, max_age, path)
+        author_id = User.objects.using(alias).values_list(
+            'pk', flat=True
+        ).first()
+        idle = self.phase(alias, None)
+        loaded = self.phase(alias, author_id)
+        self.unregister(alias)
+
+        duration = self.options['duration']
+        idle_rate = idle['reads'] / duration
+        loaded_rate = loaded['reads'] / duration
+        share = loaded_rate / idle_rate if idle_rate else 0
+        self.stdout.write(
+            f'{mode:>12} {idle_rate:>10.0f} {loaded_rate:>12.0f} '
+            f'{share:>6.0%} {loaded["writes"] / duration:>9.0f} '
+            f'{idle["errors"] + loaded["errors"]:>7}'
+        )
+
+    def phase(self, alias, author_id):
+        """Читатели (и писатель, если задан автор) работают duration секунд."""
+        stop = threading.Event()
+        results = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def read():
+            list(feed_posts().using(alias)[:POST_LIMIT])
+
+        def write():
+            with transaction.atomic(using=alias):
+                insert_posts(
+                    [('Новый пост', timezone.now(), author_id, None)],
+                    using=alias,
+                )
+
+        loop_args = (alias, stop, results, lock)
+        threads = [
+            threading.Thread(target=self.loop, args=(read, 'reads', 0,
+                                                     *loop_args))
+            for _ in range(self.options['readers'])
+        ]
+        if author_id is not None:
+            threads.append(threading.Thread(
+                target=self.loop,
+                args=(write, 'writes', self.options['write_interval'],
+                      *loop_args),
+            ))
+        for thread in threads:
+            thread.start()
+        time.sleep(self.options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def loop(self, work, key, pause, alias, stop, results, lock):
+        """Повторяет work, как поток сервера повторяет запросы."""
+        done = errors = 0
+        while not stop.is_set():
+            try:
+                work()
+                done += 1
+            except OperationalError:
+                errors += 1
+            # Граница запроса: как close_old_connections() в Django.
+            connections[alias].close_if_unusable_or_obsolete()
+            if pause:
+                time.sleep(pause)
+        connections[alias].close()
+        with lock:
+            results[key] += done
+            results['errors'] += errors
@@ -0,0 +1,49 @@
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.db.routers import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует primary в SQLite-реплики через backup API. '
+        'Без аргументов обновляет все реплики из DATABASE_REPLICAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('aliases', nargs='*', help='алиасы реплик')
+        parser.add_argument(
+            '--pages', type=int, default=0,
+            help='копировать порциями по столько страниц; 0 — за раз',
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or replicas()
+        if not aliases:
+            raise CommandError(
+                'Реплики не настроены: задайте YATUBE_REPLICA_PATH '
+                'или передайте алиасы'
+            )
+        source = connections[DEFAULT_DB_ALIAS]
+        source.ensure_connection()
+        for alias in aliases:
+            if alias == DEFAULT_DB_ALIAS or alias not in connections:
+                raise CommandError(f'Неизвестная реплика: {alias}')
+            target = connections[alias]
+            if target.vendor != 'sqlite' or source.vendor != 'sqlite':
+                raise CommandError('sync_replica умеет только SQLite')
+            target.ensure_connection()
+            started = time.monotonic()
+            source.connection.backup(
+                target.connection, pages=options['pages'] or -1
+            )
+            self.stdout.write(
+                f'{alias}: скопировано за '
+                f'{time.monotonic() - started:.2f} с'
+            )
+        # Страницы и счётчики лент могли быть собраны
+        # с отстававшей реплики — пусть пересчитаются с новой.
+        cache.clear()
@@ -0,0 +1,254 @@
+import json
+import mimetypes
+import os
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject, empty
+
+from core.compression import (
+    ENCODINGS, StreamCompressor, accepted_encodings, compress, compressible,
+    negotiate, variant_key
+)
+from core.db.routers import pin_primary, replicas, wrote_to_primary
+
+STICKY_COOKIE = 'primary_until'
+STATIC_MANIFEST = 'staticfiles.json'
+# Файл с хэшем в имени не меняется никогда: год и immutable.
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Меньше этого сжатие не окупает заголовки и время процессора.
+MIN_COMPRESS_LENGTH = 200
+# Потоковый ответ сбрасывается клиенту не реже чем через столько
+# несжатых байт, даже если компрессор ещё копит данные.
+STREAM_FLUSH_LENGTH = 64 * 1024
+# Публичные разделы: их GET-запросы без cookie сессии обслуживаются
+# без сессии и поиска пользователя (PublicSessionMiddleware).
+PUBLIC_NAMESPACES = frozenset({'posts', 'about'})
+
+
+class PrimaryStickinessMiddleware:
+    """Держит чтения пользователя на primary после его записи.
+
+    Реплики отстают от primary, поэтому после записи (пост, правка,
+    регистрация, вход) клиент получает cookie, и ещё
+    REPLICA_STICKY_SECONDS его запросы читают с primary. Должен стоять
+    выше SessionMiddleware, чтобы сохранение сессии тоже считалось.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replicas():
+            return self.get_response(request)
+        pin_primary(self.is_sticky(request))
+        try:
+            response = self.get_response(request)
+            if wrote_to_primary():
+                window = settings.REPLICA_STICKY_SECONDS
+                response.set_cookie(
+                    STICKY_COOKIE,
+                    str(int(time.time() + window)),
+                    max_age=window,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        finally:
+            pin_primary(False)
+        return response
+
+    def is_sticky(self, request):
+        until = request.COOKIES.get(STICKY_COOKIE, '')
+        return until.isdigit() and int(until) > time.time()
+
+
+class PrecompressedStaticMiddleware:
+    """Отдаёт собранную build_static статику с хэшем в имени.
+
+    Выбирает .br или .gz копию по Accept-Encoding и ставит
+    Cache-Control immutable. Файлы без хэша и запросы мимо STATIC_URL
+    проходят дальше. Без собранного манифеста middleware отключается.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        root = settings.STATIC_ROOT
+        manifest = os.path.join(root or '', STATIC_MANIFEST)
+        if not root or not os.path.exists(manifest):
+            raise MiddlewareNotUsed
+        with open(manifest, encoding='utf-8') as source:
+            hashed_names = json.load(source)['paths'].values()
+        self.files = {}
+        for name in hashed_names:
+            path = os.path.join(root, name)
+            self.files[settings.STATIC_URL + name] = (path, [
+                (encoding, path + suffix) for encoding, suffix in ENCODINGS
+                if os.path.exists(path + suffix)
+            ])
+
+    def __call__(self, request):
+        if (
+            request.method not in ('GET', 'HEAD')
+            or request.path_info not in self.files
+        ):
+            return self.get_response(request)
+        path, variants = self.files[request.path_info]
+        content_type = mimetypes.guess_type(path)[0]
+        accepted = accepted_encodings(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        encoding = None
+        for coding, variant in variants:
+            if coding in accepted:
+                encoding, path = coding, variant
+                break
+        response = FileResponse(
+            open(path, 'rb'),
+            content_type=content_type or 'application/octet-stream',
+        )
+        if encoding:
+            response['Content-Encoding'] = encoding
+        if variants:
+            patch_vary_headers(response, ('Accept-Encoding',))
+        response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+class CompressionMiddleware:
+    """Сжимает ответы в br или gzip по Accept-Encoding.
+
+    Маленькие, уже сжатые и несжимаемые по типу ответы отдаются как есть,
+    потоковые сжимаются по мере генерации. Если view поставил ответу
+    variant_cache = (ключ, timeout) — ключ его закэшированной копии, —
+    сжатое тело кэшируется рядом под ключом с кодировкой, и кэш страницы
+    не сжимается заново на каждый запрос.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if (
+            response.has_header('Content-Encoding')
+            or not compressible(response.get('Content-Type', ''))
+            or not response.streaming
+            and len(response.content) < MIN_COMPRESS_LENGTH
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                encoding, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            body = self.compressed_body(response, encoding)
+            if body is None:
+                return response
+            response.content = body
+            response['Content-Length'] = str(len(body))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # Тело уже не совпадает байт в байт с несжатым.
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compressed_body(self, response, encoding):
+        """Сжатое тело из кэша или заново; None, если сжатие не выгодно."""
+        key, timeout = getattr(response, 'variant_cache', (None, None))
+        if key is not None:
+            body = cache.get(variant_key(key, encoding))
+            if body is not None:
+                return body
+        body = compress(encoding, response.content)
+        if len(body) >= len(response.content):
+            return None
+        if key is not None:
+            cache.set(variant_key(key, encoding), body, timeout)
+        return body
+
+    def compress_stream(self, encoding, chunks):
+        compressor = StreamCompressor(encoding)
+        pending = 0
+        for chunk in chunks:
+            pending += len(chunk)
+            flush = pending >= STREAM_FLUSH_LENGTH
+            if flush:
+                pending = 0
+            output = compressor.compress(chunk, flush)
+            if output:
+                yield output
+        yield compressor.finish()
+
+
+@lru_cache(maxsize=4096)
+def public_path(path_info):
+    """Ведёт ли путь во view из PUBLIC_NAMESPACES."""
+    try:
+        match = resolve(path_info)
+    except Resolver404:
+        return False
+    return bool(match.namespaces) and match.namespaces[0] in PUBLIC_NAMESPACES
+
+
+def anonymous_read(request):
+    """GET публичной страницы от клиента без cookie сессии.
+
+    Без cookie сессия пуста, значит, пользователь анонимный: ни
+    загружать сессию, ни искать пользователя не нужно.
+    """
+    return (
+        request.method in ('GET', 'HEAD')
+        and settings.SESSION_COOKIE_NAME not in request.COOKIES
+        and public_path(request.path_info)
+    )
+
+
+class PublicSessionMiddleware(SessionMiddleware):
+    """SessionMiddleware с быстрым путём для анонимных читателей.
+
+    Для anonymous_read сессия создаётся, только если к ней обратятся
+    (например, сообщение в messages), и сохраняется обычным путём,
+    если её изменили. Vary: Cookie ставится всегда: вошедший
+    пользователь видит ту же страницу иначе.
+    """
+
+    def process_request(self, request):
+        request.anonymous_read = anonymous_read(request)
+        if not request.anonymous_read:
+            return super().process_request(request)
+        request.session = SimpleLazyObject(lambda: self.SessionStore(None))
+
+    def process_response(self, request, response):
+        if (
+            getattr(request, 'anonymous_read', False)
+            and request.session._wrapped is empty
+        ):
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        return super().process_response(request, response)
+
+
+class PublicAuthenticationMiddleware(AuthenticationMiddleware):
+    """Для anonymous_read ставит AnonymousUser, не трогая сессию."""
+
+    def process_request(self, request):
+        if getattr(request, 'anonymous_read', False):
+            request.user = AnonymousUser()
+            return None
+        return super().process_request(request)
@@ -0,0 +1,41 @@
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.templatetags.static import StaticNode
+
+from .compression import (
+    ENCODINGS, STATIC_LEVELS, available_encodings, compress
+)
+from .template_cache import constant_name
+
+# Сжатая копия нужна, только если она заметно меньше оригинала.
+MIN_COMPRESSION_RATIO = 0.95
+
+
+def compressed_variants(data):
+    """Сжатые копии data, которые стоит хранить: {суффикс: байты}."""
+    variants = {}
+    for encoding, suffix in ENCODINGS:
+        if encoding not in available_encodings():
+            continue
+        packed = compress(encoding, data, STATIC_LEVELS)
+        if len(packed) < len(data) * MIN_COMPRESSION_RATIO:
+            variants[suffix] = packed
+    return variants
+
+
+def static_references(template):
+    """Пути из {% static 'x' %} в шаблоне с постоянным аргументом."""
+    for node in template.nodelist.get_nodes_by_type(StaticNode):
+        name = constant_name(node.path)
+        if name:
+            yield name
+
+
+class BuiltStaticFilesStorage(ManifestStaticFilesStorage):
+    """Манифест-хранилище, которое отдаёт хэшированные URL и при DEBUG.
+
+    Собирается командой build_static; ссылки на файлы с хэшем в имени
+    можно кэшировать навсегда.
+    """
+
+    def url(self, name, force=False):
+        return super().url(name, force=True)
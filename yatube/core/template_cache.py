@@ -0,0 +1,68 @@
+import os
+
+from django.template import engines
+from django.template.loader_tags import ExtendsNode, IncludeNode
+
+# Загрузчики продакшен-режима: разобранные шаблоны живут в памяти
+# процесса, файлы читаются и компилируются один раз.
+CACHED_LOADERS = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
+
+def template_names(directories):
+    """Имена всех .html-шаблонов в каталогах, как их пишут в get_template."""
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                if filename.endswith('.html'):
+                    path = os.path.join(root, filename)
+                    yield os.path.relpath(path, directory).replace(
+                        os.sep, '/'
+                    )
+
+
+def constant_name(expression):
+    """Имя шаблона из {% include 'x.html' %}; None, если оно вычисляется."""
+    if isinstance(expression, str):
+        return expression
+    if getattr(expression, 'filters', True):
+        return None
+    return expression.var if isinstance(expression.var, str) else None
+
+
+def referenced_templates(template):
+    """Шаблоны, которые template подключает через include и extends."""
+    nodelist = template.nodelist
+    for node in nodelist.get_nodes_by_type(IncludeNode):
+        name = constant_name(node.template)
+        if name:
+            yield name
+    for node in nodelist.get_nodes_by_type(ExtendsNode):
+        name = constant_name(node.parent_name)
+        if name:
+            yield name
+
+
+def preload_templates(engine=None):
+    """Компилирует все шаблоны каталога templates/ в кэш загрузчика.
+
+    Include с аргументами ищет шаблон по имени на каждом рендере,
+    поэтому подключаемые шаблоны (в том числе из приложений) тоже
+    загружаются заранее: первый запрос не ходит на диск. Возвращает
+    множество загруженных имён.
+    """
+    engine = engine or engines['django']
+    pending = list(template_names(engine.engine.dirs))
+    loaded = set()
+    while pending:
+        name = pending.pop()
+        if name in loaded:
+            continue
+        template = engine.get_template(name).template
+        loaded.add(name)
+        pending.extend(referenced_templates(template))
+    return loaded
@@ -1,15 +1,96 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.shortcuts import redirect
+from django.utils.functional import cached_property
 
+from .cache import feed_stamps, index_feed, site_feed
+from .counters import FeedCount
 from .models import Post, Group
+from .search import match_expression, search_available, search_subquery
+from .sharding import sharding_enabled
+
+SHARDED_MESSAGE = (
+    'Посты разнесены по шардам (POST_SHARDS), а админка читает только '
+    'default: список и правка постов здесь недоступны'
+)
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор списка постов: без фильтров не считает COUNT(*) заново.
+
+    Для всей таблицы берётся тот же счётчик, что и для главной ленты,
+    а отфильтрованные списки считаются точно.
+    """
+
+    @cached_property
+    def count(self):
+        if self.object_list.query.has_filters():
+            return super().count
+        return FeedCount(
+            self.object_list, stamp=feed_stamps(index_feed(), site_feed())
+        )()
 
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
 
+    def refuse_sharded(self, request):
+        """С шардами админка показала бы пустую таблицу default."""
+        self.message_user(request, SHARDED_MESSAGE, messages.ERROR)
+        return redirect('admin:index')
+
+    def changelist_view(self, request, extra_context=None):
+        if sharding_enabled():
+            return self.refuse_sharded(request)
+        return super().changelist_view(request, extra_context)
+
+    def changeform_view(self, request, *args, **kwargs):
+        if sharding_enabled():
+            return self.refuse_sharded(request)
+        return super().changeform_view(request, *args, **kwargs)
+
+    def delete_view(self, request, *args, **kwargs):
+        if sharding_enabled():
+            return self.refuse_sharded(request)
+        return super().delete_view(request, *args, **kwargs)
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(
+            db_field, request, **kwargs
+        )
+        if db_field.name == 'group':
+            # Список групп читается один раз на запрос, а не в каждой
+            # строке list_editable.
+            choices = getattr(request, '_post_group_choices', None)
+            if choices is None:
+                choices = list(formfield.choices)
+                request._post_group_choices = choices
+            formfield.choices = choices
+        return formfield
+
+    def get_search_results(self, request, queryset, search_term):
+        """Ищет по FTS5-индексу постов вместо LIKE по всей таблице."""
+        if not search_term or not search_available():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        expression = match_expression(search_term)
+        if not expression:
+            return queryset.none(), False
+        queryset = queryset.extra(
+            where=[f'{Post._meta.db_table}.id IN ({search_subquery()})'],
+            params=[expression],
+        )
+        return queryset, False
+
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group)
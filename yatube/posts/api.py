@@ -0,0 +1,182 @@
+import functools
+from http import HTTPStatus
+
+from django.http import JsonResponse
+from django.views.decorators.http import require_safe
+
+from core.decorators import query_budget
+from .cache import (
+    conditional_page, feed_versions, group_feed, index_feed, profile_feed,
+    remember_page_posts
+)
+from .models import Group, User
+from .sharding import post_shards
+from .utils import (
+    CURSOR_PARAM, POST_LIMIT, ROW_POSITION, cursor_paginat, fill_related,
+    values_querysets
+)
+from .views import post_versions
+
+# Публичное имя поля в API и колонка, из которой оно читается.
+API_FIELDS = {
+    'id': 'id',
+    'text': 'text',
+    'pub_date': 'pub_date',
+    'updated': 'updated',
+    'author': 'author__username',
+    'group': 'group__slug',
+}
+FIELDS_PARAM = 'fields'
+LIMIT_PARAM = 'limit'
+API_MAX_LIMIT = 100
+# Сессия и пользователь, отметки FeedVersion для ETag и не больше двух
+# запросов самого API (группа или автор и посты).
+API_QUERY_BUDGET = 5
+# Без пробелов после разделителей: на ленте это заметная доля ответа.
+JSON_PARAMS = {'separators': (',', ':'), 'ensure_ascii': False}
+
+
+class ApiError(Exception):
+    def __init__(self, detail, status=HTTPStatus.BAD_REQUEST):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def api_budget():
+    """Бюджет API; с шардами — плюс запрос на шард и за авторов и группы."""
+    shards = len(post_shards())
+    return API_QUERY_BUDGET + (shards + 2 if shards else 0)
+
+
+def api_response(data, status=HTTPStatus.OK):
+    return JsonResponse(data, status=status, json_dumps_params=JSON_PARAMS)
+
+
+def api_view(view):
+    """GET/HEAD-only view, ошибки которого превращаются в JSON."""
+
+    @require_safe
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except ApiError as error:
+            return api_response({'detail': error.detail}, error.status)
+    return wrapper
+
+
+def selected_fields(request):
+    """Поля из ?fields=id,text; без параметра — все поля."""
+    raw = request.GET.get(FIELDS_PARAM)
+    if not raw:
+        return list(API_FIELDS)
+    names = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in names if name not in API_FIELDS]
+    if unknown or not names:
+        raise ApiError(
+            f'Неизвестные поля: {", ".join(unknown)}. '
+            f'Доступны: {", ".join(API_FIELDS)}'
+        )
+    return list(dict.fromkeys(names))
+
+
+def page_size(request):
+    raw = request.GET.get(LIMIT_PARAM)
+    if raw is None:
+        return POST_LIMIT
+    if not raw.isdigit() or not 0 < int(raw) <= API_MAX_LIMIT:
+        raise ApiError(f'limit должен быть от 1 до {API_MAX_LIMIT}')
+    return int(raw)
+
+
+def serialize(rows, names):
+    return [
+        {name: row[API_FIELDS[name]] for name in names} for row in rows
+    ]
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query[CURSOR_PARAM] = cursor
+    return request.build_absolute_uri('?' + query.urlencode())
+
+
+def posts_page(request, **filters):
+    """Страница ленты по курсору прямо из строк values()."""
+    names = selected_fields(request)
+    # pub_date и id нужны для курсора, даже если их не просили.
+    columns = {API_FIELDS[name] for name in names} | {'pub_date', 'id'}
+    page = cursor_paginat(
+        request,
+        values_querysets(columns, **filters),
+        per_page=page_size(request),
+        position=ROW_POSITION,
+    )
+    fill_related(page.object_list, columns)
+    remember_page_posts(request, [row['id'] for row in page])
+    return {
+        'results': serialize(page, names),
+        'next': page_url(request, page.next_cursor),
+        'previous': page_url(request, page.previous_cursor),
+    }
+
+
+def first_or_404(queryset, detail):
+    row = queryset.first()
+    if row is None:
+        raise ApiError(detail, HTTPStatus.NOT_FOUND)
+    return row
+
+
+@api_view
+@query_budget(api_budget)
+@conditional_page(feed_versions(index_feed))
+def index(request):
+    return api_response(posts_page(request))
+
+
+@api_view
+@query_budget(api_budget)
+@conditional_page(feed_versions(group_feed))
+def group_posts(request, slug):
+    group = first_or_404(
+        Group.objects.filter(slug=slug).values(
+            'id', 'title', 'slug', 'description'
+        ),
+        'Группа не найдена',
+    )
+    data = posts_page(request, group_id=group.pop('id'))
+    return api_response({'group': group, **data})
+
+
+@api_view
+@query_budget(api_budget)
+@conditional_page(feed_versions(profile_feed))
+def profile(request, username):
+    author = first_or_404(
+        User.objects.filter(username=username).values(
+            'id', 'username', 'first_name', 'last_name',
+            'post_counter__posts_count',
+        ),
+        'Автор не найден',
+    )
+    author['posts_count'] = author.pop('post_counter__posts_count') or 0
+    data = posts_page(request, author_id=author.pop('id'))
+    return api_response({'author': author, **data})
+
+
+@api_view
+@query_budget(api_budget)
+@conditional_page(post_versions)
+def post_detail(request, post_id):
+    names = selected_fields(request)
+    columns = {API_FIELDS[name] for name in names}
+    for queryset in values_querysets(columns, pk=post_id):
+        post = queryset.first()
+        if post is not None:
+            fill_related([post], columns)
+            return api_response(serialize([post], names)[0])
+    raise ApiError('Пост не найден', HTTPStatus.NOT_FOUND)
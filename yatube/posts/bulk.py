@@ -0,0 +1,79 @@
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+
+from .models import Post
+
+POST_COLUMNS = (
+    'text', 'pub_date', 'updated', 'author', 'group', 'image',
+    'thumbnails',
+)
+
+
+def insert_posts(rows, using=DEFAULT_DB_ALIAS):
+    """Вставляет посты одним executemany, минуя save() и сигналы.
+
+    rows — кортежи (text, pub_date, author_id, group_id). В отличие
+    от bulk_create, дата публикации сохраняется как есть, а не
+    заменяется текущим временем из auto_now_add. Посты вставляются без
+    картинок. Счётчики и кэши лент вызывающий код обновляет сам.
+    """
+    connection = connections[using]
+    ops = connection.ops
+    quote = ops.quote_name
+    columns = ', '.join(
+        quote(Post._meta.get_field(name).column) for name in POST_COLUMNS
+    )
+    placeholders = ', '.join(['%s'] * len(POST_COLUMNS))
+    sql = (
+        f'INSERT INTO {quote(Post._meta.db_table)} ({columns}) '
+        f'VALUES ({placeholders})'
+    )
+    now = ops.adapt_datetimefield_value(timezone.now())
+    params = [
+        (text, ops.adapt_datetimefield_value(pub_date), now,
+         author_id, group_id, '', '')
+        for text, pub_date, author_id, group_id in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+    return len(params)
+
+
+COPY_COLUMNS = (
+    'id', 'text', 'pub_date', 'updated', 'author', 'group', 'image',
+    'thumbnails',
+)
+
+
+def copy_posts(rows, using):
+    """Вставляет посты как есть — с id и обеими датами.
+
+    rows — кортежи (id, text, pub_date, updated, author_id, group_id,
+    image, thumbnails), например из values_list(*COPY_COLUMNS)
+    другой базы. Строки с теми же id сначала удаляются, чтобы триггеры
+    поискового индекса отработали и на удаление, и на вставку.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    connection = connections[using]
+    ops = connection.ops
+    quote = ops.quote_name
+    table = quote(Post._meta.db_table)
+    columns = ', '.join(
+        quote(Post._meta.get_field(name).column) for name in COPY_COLUMNS
+    )
+    placeholders = ', '.join(['%s'] * len(COPY_COLUMNS))
+    params = [
+        (pk, text, ops.adapt_datetimefield_value(pub_date),
+         ops.adapt_datetimefield_value(updated), *rest)
+        for pk, text, pub_date, updated, *rest in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'DELETE FROM {table} WHERE id = %s', [(row[0],) for row in rows]
+        )
+        cursor.executemany(
+            f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', params
+        )
+    return len(params)
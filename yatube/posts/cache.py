@@ -0,0 +1,238 @@
+import functools
+from datetime import datetime, timezone as dt_timezone
+from hashlib import md5
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models import CharField, Subquery, Value
+from django.db.models.functions import Concat
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from .models import FeedVersion
+from .utils import CURSOR_PARAM
+
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+
+def _key(prefix, *parts):
+    digest = md5(':'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'{prefix}:{digest}'
+
+
+def index_feed(**kwargs):
+    return 'index'
+
+
+def group_feed(slug, **kwargs):
+    return f'group:{slug}'
+
+
+def profile_feed(username, **kwargs):
+    return f'profile:{username}'
+
+
+def site_feed(**kwargs):
+    """Всё, что видно на любой странице: названия групп, имена авторов."""
+    return 'site'
+
+
+def post_feed(pk):
+    """Содержимое одного поста: его отметку двигает правка."""
+    return f'post:{pk}'
+
+
+def page_marker(query):
+    """Приводит параметры страницы к одному виду: ?page=1 == без параметров."""
+    if CURSOR_PARAM in query:
+        return 'cursor:' + query.get(CURSOR_PARAM)
+    page = query.get('page', '1')
+    return 'page:' + (page if page.isdigit() else '1')
+
+
+def page_key(feed, marker, stamps):
+    """Ключ страницы ленты: меняется с версией ленты, сайта и её постов."""
+    return _key('feed_page', feed, *stamps, marker)
+
+
+def page_posts_key(request):
+    return _key('page_posts', request.get_full_path())
+
+
+def remember_page_posts(request, ids):
+    """Запоминает, какие посты показала страница ленты.
+
+    Состав страницы меняется только вместе с отметкой ленты, поэтому
+    он хранится при ней: пока отметка та же, следующий запрос сразу
+    читает и отметки этих постов (feed_versions).
+    """
+    stamps = getattr(request, '_feed_stamps', None)
+    if stamps is not None:
+        cache.set(
+            page_posts_key(request), (stamps[0], list(ids)),
+            PAGE_CACHE_TIMEOUT,
+        )
+
+
+def purge_site():
+    """Сбрасывает страницы и валидаторы всех лент разом."""
+    touch_feeds(site_feed())
+
+
+def cache_anonymous_page(feed):
+    """Кэширует ленту целиком для анонимных GET-запросов.
+
+    Ставится под conditional_page(feed_versions(...)): в ключ страницы
+    входят прочитанные там отметки FeedVersion ленты, сайта и постов
+    страницы. Новый или удалённый пост в ленте из любого процесса
+    меняет ключ всех её страниц, правка — только страниц с этим
+    постом; старые страницы доживают свой таймаут невостребованными.
+    Пока состав страницы неизвестен (первый запрос после изменения
+    ленты), страница отдаётся без кэша. Сжатые копии страницы
+    CompressionMiddleware кэширует рядом, под тем же ключом.
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            stamps = getattr(request, '_page_versions', None)
+            if (
+                request.method not in ('GET', 'HEAD')
+                or request.user.is_authenticated
+                or stamps is None
+            ):
+                return view(request, *args, **kwargs)
+
+            key = page_key(feed(**kwargs), page_marker(request.GET), stamps)
+            response = cache.get(key)
+            if response is not None:
+                response.variant_cache = (key, PAGE_CACHE_TIMEOUT)
+                return response
+
+            response = view(request, *args, **kwargs)
+            if response.status_code != HTTPStatus.OK:
+                return response
+            response.variant_cache = (key, PAGE_CACHE_TIMEOUT)
+            response.add_post_render_callback(
+                lambda rendered: cache.set(key, rendered, PAGE_CACHE_TIMEOUT)
+            )
+            return response
+        return wrapper
+    return decorator
+
+
+def touch_feeds(*feeds):
+    """Отмечает в базе, что содержимое лент изменилось прямо сейчас."""
+    now = timezone.now()
+    for feed in set(feeds):
+        if not FeedVersion.objects.filter(feed=feed).update(changed=now):
+            FeedVersion.objects.get_or_create(
+                feed=feed, defaults={'changed': now}
+            )
+
+
+def forget_feeds(*feeds):
+    """Удаляет отметки лент, которых больше нет (удалённый пост)."""
+    FeedVersion.objects.filter(feed__in=feeds).delete()
+
+
+def feed_stamps(*feeds):
+    """Отметки изменения лент (timestamp) одним запросом.
+
+    Запрос идёт на каждую страницу, поэтому он собран вручную: через
+    ORM он обходится на порядок дороже самой выборки по индексу. Лента
+    без отметки ещё не менялась с появления FeedVersion: её версия — 0,
+    а Last-Modified страницы задаёт отметка сайта.
+    """
+    connection = connections[router.db_for_read(FeedVersion)]
+    quote = connection.ops.quote_name
+    meta = FeedVersion._meta
+    feed_column = quote(meta.get_field('feed').column)
+    field = meta.get_field('changed')
+    column = field.cached_col
+    converters = (
+        connection.ops.get_db_converters(column)
+        + field.get_db_converters(connection)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {feed_column}, {quote(field.column)} '
+            f'FROM {quote(meta.db_table)} WHERE {feed_column} IN '
+            f'({", ".join(["%s"] * len(feeds))})',
+            feeds,
+        )
+        rows = cursor.fetchall()
+    changed = {}
+    for feed, value in rows:
+        for converter in converters:
+            value = converter(value, column, connection)
+        changed[feed] = value.timestamp()
+    return [changed.get(feed, 0) for feed in feeds]
+
+
+def stamp_subquery(feed):
+    """Отметка ленты подзапросом; feed — имя или выражение с OuterRef."""
+    return Subquery(
+        FeedVersion.objects.filter(feed=feed).values('changed')[:1]
+    )
+
+
+def profile_stamp_subquery(username):
+    """Отметка ленты автора по выражению с его username."""
+    return stamp_subquery(
+        Concat(Value(profile_feed('')), username, output_field=CharField())
+    )
+
+
+def conditional_page(versions):
+    """ETag и Last-Modified страницы по дешёвым отметкам версий.
+
+    versions(request, **kwargs) возвращает список timestamp, от которых
+    зависит страница, включая отметку site_feed(), или None, если
+    страницы нет или её версия пока неизвестна. Совпавший запрос
+    получает 304 до выборки постов и рендеринга шаблона.
+    """
+
+    def page_versions(request, **kwargs):
+        if not hasattr(request, '_page_versions'):
+            request._page_versions = versions(request, **kwargs)
+        return request._page_versions
+
+    def etag(request, *args, **kwargs):
+        stamps = page_versions(request, **kwargs)
+        if stamps is None:
+            return None
+        # Шапка страницы зависит от пользователя.
+        return _key('page', *stamps, request.user.pk or 0)
+
+    def last_modified(request, *args, **kwargs):
+        stamps = page_versions(request, **kwargs)
+        if stamps is None:
+            return None
+        return datetime.fromtimestamp(max(stamps), tz=dt_timezone.utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
+
+
+def feed_versions(feed):
+    """Версии для страниц ленты: отметки ленты, сайта и постов страницы.
+
+    Посты страницы берутся из remember_page_posts() прошлого запроса
+    и читаются тем же запросом, что и отметка ленты. Если отметка
+    ленты с тех пор сдвинулась, состав страницы мог измениться:
+    версия неизвестна, пока страница не отрисуется заново.
+    """
+
+    def versions(request, **kwargs):
+        known = cache.get(page_posts_key(request))
+        ids = known[1] if known else []
+        feed_stamp, site_stamp, *post_stamps = feed_stamps(
+            feed(**kwargs), site_feed(), *map(post_feed, ids)
+        )
+        # Отметки ленты и сайта: по ним же кэшируется число постов.
+        request._feed_stamps = (feed_stamp, site_stamp)
+        if known is None or known[0] != feed_stamp:
+            return None
+        return [feed_stamp, site_stamp, *post_stamps]
+    return versions
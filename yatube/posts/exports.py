@@ -0,0 +1,60 @@
+import csv
+import json
+from itertools import islice
+
+from .utils import fill_related, values_querysets
+
+EXPORT_FIELDS = (
+    ('id', 'id'),
+    ('text', 'text'),
+    ('pub_date', 'pub_date'),
+    ('author', 'author__username'),
+    ('group', 'group__slug'),
+)
+EXPORT_FORMATS = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Псевдобуфер для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(filters):
+    """Строки постов для выгрузки, читаемые из базы порциями.
+
+    Шарды выгружаются по очереди, имена авторов и slug групп для них
+    подставляются на каждую порцию.
+    """
+    columns = [column for _, column in EXPORT_FIELDS]
+    for queryset in values_querysets(columns, **filters):
+        rows = queryset.iterator(chunk_size=CHUNK_SIZE)
+        while True:
+            chunk = list(islice(rows, CHUNK_SIZE))
+            if not chunk:
+                break
+            for row in fill_related(chunk, columns):
+                yield tuple(row[column] for column in columns)
+
+
+def export_lines(export_format, **filters):
+    """Генератор строк выгрузки постов в JSON Lines или CSV."""
+    names = [name for name, _ in EXPORT_FIELDS]
+    if export_format == 'csv':
+        writer = csv.writer(Echo())
+        yield writer.writerow(names)
+        for row in export_rows(filters):
+            yield writer.writerow(
+                value.isoformat() if hasattr(value, 'isoformat') else value
+                for value in row
+            )
+        return
+    for row in export_rows(filters):
+        record = dict(zip(names, row))
+        record['pub_date'] = record['pub_date'].isoformat()
+        yield json.dumps(record, ensure_ascii=False) + '\n'
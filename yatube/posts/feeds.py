@@ -0,0 +1,175 @@
+from hashlib import md5
+
+from django.contrib.syndication.views import Feed
+from django.shortcuts import get_object_or_404
+from django.urls import reverse, reverse_lazy
+from django.utils.feedgenerator import Atom1Feed
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from .cache import (
+    feed_stamps, group_feed, index_feed, post_feed, profile_feed, site_feed
+)
+from .models import Group, Post, User
+from .sharding import sharding_enabled
+from .utils import CURSOR_ORDERING, latest_posts, merge_rows
+
+FEED_ITEMS = 20
+TITLE_LENGTH = 60
+
+
+def newest_filters(slug=None, username=None):
+    """Фильтр постов ленты; None — такой группы или автора нет.
+
+    В шардах нет таблиц групп и пользователей, поэтому с шардами
+    slug и username сначала превращаются в id.
+    """
+    filters = {}
+    if not sharding_enabled():
+        if slug is not None:
+            filters['group__slug'] = slug
+        if username is not None:
+            filters['author__username'] = username
+        return filters
+    if slug is not None:
+        filters['group_id'] = Group.objects.filter(slug=slug).values_list(
+            'id', flat=True
+        ).first()
+    if username is not None:
+        filters['author_id'] = User.objects.filter(
+            username=username
+        ).values_list('id', flat=True).first()
+    if None in filters.values():
+        return None
+    return filters
+
+
+def newest_posts(request, slug=None, username=None):
+    """Даты и id постов ленты, от свежих; один раз на request."""
+    if not hasattr(request, '_newest_posts'):
+        filters = newest_filters(slug, username)
+        request._newest_posts = filters is not None and merge_rows(
+            [
+                queryset.order_by(*CURSOR_ORDERING)
+                .values_list('pub_date', 'id')
+                for queryset in Post.objects.on_shards(**filters)
+            ],
+            tuple,
+            backwards=False,
+            limit=FEED_ITEMS,
+        ) or []
+    return request._newest_posts
+
+
+def feed_last_modified(request, **kwargs):
+    newest = newest_posts(request, **kwargs)
+    return newest[0][0] if newest else None
+
+
+def feed_etag(request, slug=None, username=None):
+    """ETag по тем же отметкам FeedVersion, что и у HTML-страниц.
+
+    Отметка ленты сдвигается на новом или удалённом посте, отметки
+    постов — на правке любого поста ленты, а не только самого свежего.
+    """
+    newest = newest_posts(request, slug=slug, username=username)
+    if not newest:
+        return None
+    if slug is not None:
+        feed = group_feed(slug)
+    elif username is not None:
+        feed = profile_feed(username)
+    else:
+        feed = index_feed()
+    stamps = feed_stamps(
+        feed, site_feed(), *(post_feed(pk) for _, pk in newest)
+    )
+    return md5(':'.join(map(str, stamps)).encode()).hexdigest()
+
+
+def conditional(feed):
+    """Отвечает 304 по ETag и Last-Modified до выборки постов ленты."""
+    return condition(
+        etag_func=feed_etag, last_modified_func=feed_last_modified
+    )(feed)
+
+
+class LatestPostsFeed(Feed):
+    title = 'Yatube: последние записи'
+    link = reverse_lazy('posts:index')
+    description = 'Новые записи всех авторов Yatube'
+
+    def items(self):
+        return latest_posts(FEED_ITEMS)
+
+    def item_title(self, item):
+        return Truncator(item.text).chars(TITLE_LENGTH)
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('posts:post_detail', args=[item.pk])
+
+    def item_pubdate(self, item):
+        return item.pub_date
+
+    def item_updateddate(self, item):
+        return item.updated
+
+    def item_author_name(self, item):
+        return item.author.get_full_name() or item.author.username
+
+
+class GroupPostsFeed(LatestPostsFeed):
+    def get_object(self, request, slug):
+        return get_object_or_404(Group, slug=slug)
+
+    def title(self, group):
+        return f'Yatube: записи сообщества {group.title}'
+
+    def link(self, group):
+        return reverse('posts:group_list', args=[group.slug])
+
+    def description(self, group):
+        return group.description
+
+    def items(self, group):
+        return latest_posts(FEED_ITEMS, group=group)
+
+
+class AuthorPostsFeed(LatestPostsFeed):
+    def get_object(self, request, username):
+        return get_object_or_404(User, username=username)
+
+    def title(self, author):
+        name = author.get_full_name() or author.username
+        return f'Yatube: записи пользователя {name}'
+
+    def link(self, author):
+        return reverse('posts:profile', args=[author.username])
+
+    def description(self, author):
+        return self.title(author)
+
+    def items(self, author):
+        return latest_posts(FEED_ITEMS, author=author)
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
+
+
+class GroupPostsAtomFeed(GroupPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, group):
+        return group.description
+
+
+class AuthorPostsAtomFeed(AuthorPostsFeed):
+    feed_type = Atom1Feed
+
+    def subtitle(self, author):
+        return self.title(author)
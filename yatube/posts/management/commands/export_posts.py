@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exports import EXPORT_FORMATS, export_lines
+from posts.models import Group, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково выгружает посты: всю ленту, группу или автора '
+        'в JSON Lines или CSV.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--group', help='slug группы')
+        parser.add_argument('--author', help='username автора')
+        parser.add_argument(
+            '--format', choices=tuple(EXPORT_FORMATS), default='jsonl'
+        )
+        parser.add_argument(
+            '-o', '--output', help='файл для выгрузки; по умолчанию stdout'
+        )
+
+    def handle(self, *args, **options):
+        filters = {}
+        try:
+            if options['group']:
+                filters['group'] = Group.objects.get(slug=options['group'])
+            if options['author']:
+                filters['author'] = User.objects.get(
+                    username=options['author']
+                )
+        except (Group.DoesNotExist, User.DoesNotExist) as error:
+            raise CommandError(error)
+
+        lines = export_lines(options['format'], **filters)
+        if options['output']:
+            with open(
+                options['output'], 'w', encoding='utf-8', newline=''
+            ) as stream:
+                stream.writelines(lines)
+            return
+        for line in lines:
+            self.stdout.write(line, ending='')
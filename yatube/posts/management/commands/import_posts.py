@@ -0,0 +1,230 @@
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import insert_posts
+from posts.cache import group_feed, index_feed, profile_feed, touch_feeds
+from posts.counters import add_post_counts
+from posts.models import Group, ImportCheckpoint, User
+from posts.sharding import sharding_enabled
+
+FORMATS = ('jsonl', 'csv')
+BATCH_SIZE = 5000
+# Строка JSON Lines, которую не удалось разобрать.
+INVALID_JSON = object()
+
+
+class Command(BaseCommand):
+    help = (
+        'Потоково импортирует посты из JSON Lines или CSV (файл или stdin). '
+        'Поля записи: text, author (username), group (slug), pub_date. '
+        'После сбоя повторный запуск продолжает с последней пачки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="путь к файлу или '-' для stdin")
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='формат данных; по умолчанию — по расширению файла',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='сколько постов вставлять в одной транзакции',
+        )
+        parser.add_argument(
+            '--job',
+            help=(
+                'имя задания для чекпоинта; по умолчанию путь к файлу, '
+                'а stdin без --job импортируется без чекпоинта'
+            ),
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='начать с первой записи, не глядя на чекпоинт',
+        )
+
+    def handle(self, *args, **options):
+        if sharding_enabled():
+            raise CommandError(
+                'import_posts вставляет посты в default и не поддерживает '
+                'шарды; импортируйте без POST_SHARDS'
+            )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть не меньше 1')
+        source = options['source']
+        data_format = options['format'] or self.guess_format(source)
+        job = options['job'] or (
+            None if source == '-' else os.path.abspath(source)
+        )
+        self.batch_size = options['batch_size']
+        self.authors = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+        self.password = make_password(None)
+
+        # У stdin нет имени: без --job разные потоки делили бы один
+        # чекпоинт, поэтому такой импорт не продолжается после сбоя.
+        self.checkpoint = ImportCheckpoint(name='stdin')
+        if job is not None:
+            self.checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+                name=job
+            )
+        if options['restart']:
+            self.checkpoint.position = 0
+        if self.checkpoint.position:
+            self.stdout.write(
+                f'Продолжаем задание {job} с записи '
+                f'{self.checkpoint.position}'
+            )
+
+        stream = sys.stdin if source == '-' else open(
+            source, encoding='utf-8', newline=''
+        )
+        try:
+            self.run(self.read(stream, data_format))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+    def guess_format(self, source):
+        extension = os.path.splitext(source)[1].lstrip('.').lower()
+        if extension in FORMATS:
+            return extension
+        if extension == 'json':
+            return 'jsonl'
+        raise CommandError('Укажите --format: jsonl или csv')
+
+    def read(self, stream, data_format):
+        """Записи с номерами строк; битая строка JSON — INVALID_JSON."""
+        if data_format == 'csv':
+            reader = csv.DictReader(stream)
+            for record in reader:
+                yield reader.line_num, record
+            return
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError:
+                yield line_number, INVALID_JSON
+
+    def run(self, records):
+        started = time.monotonic()
+        self.imported = self.skipped = 0
+        batch = []
+        position = self.checkpoint.position
+        for number, (line_number, record) in enumerate(records, start=1):
+            if number <= self.checkpoint.position:
+                continue
+            position = number
+            row = self.parse(line_number, record)
+            if row is None:
+                self.skipped += 1
+            else:
+                batch.append(row)
+            if len(batch) >= self.batch_size:
+                self.flush(batch, position)
+                batch = []
+                self.report(started)
+        if position > self.checkpoint.position:
+            self.flush(batch, position)
+        self.report(started)
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: импортировано {self.imported}, '
+            f'пропущено {self.skipped}'
+        ))
+
+    def parse(self, line_number, record):
+        if record is INVALID_JSON:
+            self.stderr.write(f'Строка {line_number}: неверный JSON')
+            return None
+        if not isinstance(record, dict):
+            self.stderr.write(f'Строка {line_number}: запись не объект')
+            return None
+        text = record.get('text')
+        author = record.get('author')
+        group = record.get('group') or None
+        if not isinstance(text, str) or not isinstance(author, str) or (
+            not text or not author
+        ):
+            self.stderr.write(f'Строка {line_number}: нет text или author')
+            return None
+        if group is not None and not isinstance(group, str):
+            self.stderr.write(f'Строка {line_number}: неверный group')
+            return None
+        pub_date = timezone.now()
+        if record.get('pub_date'):
+            pub_date = (
+                parse_datetime(record['pub_date'])
+                if isinstance(record['pub_date'], str) else None
+            )
+            if pub_date is None:
+                self.stderr.write(f'Строка {line_number}: неверный pub_date')
+                return None
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        return text, pub_date, author, group
+
+    def resolve(self, batch):
+        """Дополняет карты авторов и групп недостающими записями."""
+        usernames = {author for _, _, author, _ in batch} - set(self.authors)
+        if usernames:
+            User.objects.bulk_create(
+                User(username=username, password=self.password)
+                for username in usernames
+            )
+            self.authors.update(
+                User.objects.filter(username__in=usernames)
+                .values_list('username', 'id')
+            )
+        slugs = {group for _, _, _, group in batch if group}
+        slugs -= set(self.groups)
+        if slugs:
+            Group.objects.bulk_create(
+                Group(title=slug, slug=slug, description='')
+                for slug in slugs
+            )
+            self.groups.update(
+                Group.objects.filter(slug__in=slugs).values_list('slug', 'id')
+            )
+
+    def flush(self, batch, position):
+        with transaction.atomic():
+            self.resolve(batch)
+            rows = [
+                (text, pub_date, self.authors[author],
+                 self.groups[group] if group else None)
+                for text, pub_date, author, group in batch
+            ]
+            insert_posts(rows)
+            authors = Counter(author_id for _, _, author_id, _ in rows)
+            add_post_counts(authors)
+            self.checkpoint.position = position
+            if self.checkpoint.pk is not None:
+                self.checkpoint.save()
+        self.imported += len(rows)
+
+        usernames = {author for _, _, author, _ in batch}
+        slugs = {group for _, _, _, group in batch if group}
+        touch_feeds(
+            index_feed(),
+            *(profile_feed(username) for username in usernames),
+            *(group_feed(slug) for slug in slugs),
+        )
+
+    def report(self, started):
+        elapsed = max(time.monotonic() - started, 1e-6)
+        self.stdout.write(
+            f'Импортировано {self.imported} '
+            f'({self.imported / elapsed:.0f} записей/с), '
+            f'позиция {self.checkpoint.position}'
+        )
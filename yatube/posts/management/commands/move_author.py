@@ -0,0 +1,118 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+from posts.bulk import COPY_COLUMNS, copy_posts
+from posts.models import Post, User
+from posts.sharding import (
+    AuthorMoving, assign_shard, cancel_move, post_shards, shard_for_author,
+    start_move
+)
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит все посты автора в другой шард. На время переноса '
+        'посты автора закрыты на запись; они копируются пачками, правки, '
+        'успевшие начаться до закрытия, докопируются, справочник '
+        'переключается на новый шард, и только после этого из старого '
+        'шарда удаляются скопированные посты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='автор')
+        parser.add_argument('shard', help='алиас шарда из POST_SHARDS')
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='сколько постов копировать в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        shards = post_shards()
+        if not shards:
+            raise CommandError('Шардирование выключено: POST_SHARDS пуст')
+        target = options['shard']
+        if target not in shards:
+            raise CommandError(
+                f'Неизвестный шард {target}; есть: {", ".join(shards)}'
+            )
+        author = User.objects.filter(username=options['username']).first()
+        if author is None:
+            raise CommandError(f'Нет автора {options["username"]}')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть не меньше 1')
+        if shard_for_author(author.pk) == target:
+            self.stdout.write(f'{author.username} уже в шарде {target}')
+            return
+
+        self.batch_size = options['batch_size']
+        try:
+            source, copied, deleted = self.move(author.pk, target)
+        except AuthorMoving as error:
+            raise CommandError(f'Перенос уже идёт: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{author.username}: {source} → {target}, '
+            f'перенесено {len(copied)}, удалено из {source} {deleted}'
+        ))
+        left = Post.objects.using(source).filter(author_id=author.pk).count()
+        if left:
+            self.stderr.write(
+                f'В {source} остались посты, записанные после '
+                f'копирования: {left}'
+            )
+
+    def move(self, author_id, target):
+        """Копирует посты автора, пока они закрыты на запись.
+
+        Возвращает прежний шард, id скопированных постов и сколько
+        из них удалено из прежнего шарда.
+        """
+        started = timezone.now()
+        source = start_move(author_id, target)
+        try:
+            posts = Post.objects.using(source).filter(author_id=author_id)
+            copied = self.copy(posts, target)
+            # Запись, которая выбрала шард до start_move, могла
+            # закончиться уже во время копирования.
+            copied |= self.copy(posts.filter(updated__gte=started), target)
+        except BaseException:
+            cancel_move(author_id)
+            raise
+        assign_shard(author_id, target)
+        return source, copied, self.delete(source, copied)
+
+    def copy(self, posts, target):
+        """Копирует посты пачками, возвращает множество их id."""
+        copied = set()
+        batch = []
+        rows = posts.order_by('id').values_list(*COPY_COLUMNS)
+        for row in rows.iterator(chunk_size=self.batch_size):
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                copied.update(self.flush(batch, target))
+                batch = []
+        copied.update(self.flush(batch, target))
+        return copied
+
+    def delete(self, source, ids):
+        """Удаляет из source только скопированные посты, без сигналов.
+
+        От переезда счётчики не меняются.
+        """
+        ids = sorted(ids)
+        deleted = 0
+        sql = f'DELETE FROM {Post._meta.db_table} WHERE id = %s'
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start:start + self.batch_size]
+            with transaction.atomic(using=source):
+                with connections[source].cursor() as cursor:
+                    cursor.executemany(sql, [(pk,) for pk in batch])
+                    deleted += len(batch)
+        return deleted
+
+    def flush(self, batch, target):
+        with transaction.atomic(using=target):
+            copy_posts(batch, using=target)
+        return [row[0] for row in batch]
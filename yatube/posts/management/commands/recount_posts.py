@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_author_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает хранимые счётчики постов авторов с нуля.'
+
+    def handle(self, *args, **options):
+        authors = recount_author_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики пересчитаны, авторов с постами: {authors}'
+        ))
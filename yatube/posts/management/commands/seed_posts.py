@@ -0,0 +1,258 @@
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from faker import Faker
+
+from posts.bulk import insert_posts
+from posts.cache import purge_site
+from posts.counters import recount_author_counters
+from posts.models import MAX_LENGTH, Group, User
+from posts.search import (
+    drop_search_triggers, install_search_index, search_available
+)
+from posts.sharding import sharding_enabled
+
+BATCH_SIZE = 10000
+# Тексты постов собираются из этого пула предложений Faker: генерировать
+# каждое предложение заново слишком долго для миллионов постов.
+SENTENCES = 2000
+SENTENCES_PER_POST = (1, 6)
+# Доля постов без группы.
+NO_GROUP_SHARE = 0.3
+# Показатели степенного закона: вес автора (группы) с рангом r — 1 / r^s.
+AUTHOR_SKEW = 1.1
+GROUP_SKEW = 1.5
+# Активность по часам суток, относительные веса.
+DAILY_ACTIVITY = (
+    3, 2, 1, 1, 1, 2, 4, 6, 7, 7, 7, 8,
+    8, 7, 7, 7, 8, 9, 10, 10, 9, 7, 5, 4,
+)
+# Всплески: в среднем один на столько дней, длительностью и силой
+# (во сколько раз растёт поток постов) из этих диапазонов.
+BURST_EVERY_DAYS = 7
+BURST_HOURS = (2, 12)
+BURST_BOOST = (5, 30)
+
+
+def power_law(count, skew):
+    """Накопленные веса рангов 1..count для random.choices."""
+    return list(accumulate(1 / rank ** skew for rank in range(1, count + 1)))
+
+
+def hourly_weights(rng, hours):
+    """Веса часов периода: суточный ритм, умноженный на всплески."""
+    weights = [DAILY_ACTIVITY[hour % 24] for hour in range(hours)]
+    for _ in range(max(1, hours // (24 * BURST_EVERY_DAYS))):
+        start = rng.randrange(hours)
+        boost = rng.uniform(*BURST_BOOST)
+        for hour in range(start, min(start + rng.randint(*BURST_HOURS),
+                                     hours)):
+            weights[hour] *= boost
+    return weights
+
+
+def spread(rng, total, weights):
+    """Раскладывает total постов по часам пропорционально весам."""
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    for hour in rng.choices(
+        range(len(weights)), weights=weights, k=total - sum(counts)
+    ):
+        counts[hour] += 1
+    return counts
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими данными: пользователи, группы и '
+        'посты со степенным распределением по авторам и группам и '
+        'всплесками по времени. При одних --seed и --end на пустой базе '
+        'данные совпадают от запуска к запуску.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=1000, help='сколько авторов создать',
+        )
+        parser.add_argument(
+            '--groups', type=int, default=50, help='сколько групп создать',
+        )
+        parser.add_argument(
+            '--posts', type=int, default=100000,
+            help='сколько постов создать',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='за сколько дней до --end распределить посты',
+        )
+        parser.add_argument(
+            '--end', type=datetime.fromisoformat,
+            help='конец периода, ГГГГ-ММ-ДД; по умолчанию начало сегодня',
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='зерно генератора случайных чисел',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=BATCH_SIZE,
+            help='сколько постов вставлять в одной транзакции',
+        )
+
+    def handle(self, *args, **options):
+        if sharding_enabled():
+            raise CommandError(
+                'seed_posts вставляет посты в default и не поддерживает '
+                'шарды; заполните базу без POST_SHARDS'
+            )
+        if min(options['users'], options['days']) < 1 or (
+            options['groups'] < 0 or options['posts'] < 0
+        ):
+            raise CommandError(
+                'Нужны хотя бы один автор и один день, '
+                'количества не могут быть отрицательными'
+            )
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть не меньше 1')
+        seed = options['seed']
+        self.rng = random.Random(seed)
+        self.faker = Faker('ru_RU')
+        self.faker.seed_instance(seed)
+        self.seed = seed
+        self.batch_size = options['batch_size']
+
+        end = options['end'] or timezone.now().replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end, timezone.utc)
+        self.start = end - timedelta(days=options['days'])
+
+        started = time.monotonic()
+        self.authors = self.create_users(options['users'])
+        self.groups = self.create_groups(options['groups'])
+        self.stdout.write(
+            f'Создано авторов: {len(self.authors)}, групп: {len(self.groups)}'
+        )
+        self.sentences = [
+            self.faker.sentence(nb_words=12) for _ in range(SENTENCES)
+        ]
+
+        drop_search_triggers()
+        try:
+            self.insert(options['posts'], options['days'] * 24, started)
+        finally:
+            if search_available():
+                self.stdout.write('Перестраиваем поисковый индекс')
+                install_search_index(rebuild=True)
+        recount_author_counters()
+        purge_site()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: постов {self.inserted} за '
+            f'{time.monotonic() - started:.1f} с'
+        ))
+
+    def create_users(self, count):
+        first = f'{self.faker.user_name()}_{self.seed}_0'
+        if User.objects.filter(username=first).exists():
+            raise CommandError(
+                f'Данные с --seed {self.seed} уже загружены '
+                f'(есть пользователь вида {first}); возьмите другой --seed'
+            )
+        password = make_password(None)
+        last_id = User.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+        users = [User(
+            username=first,
+            first_name=self.faker.first_name(),
+            last_name=self.faker.last_name(),
+            password=password,
+        )]
+        users.extend(
+            User(
+                username=f'{self.faker.user_name()}_{self.seed}_{number}',
+                first_name=self.faker.first_name(),
+                last_name=self.faker.last_name(),
+                password=password,
+            )
+            for number in range(1, count)
+        )
+        User.objects.bulk_create(users)
+        authors = list(
+            User.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', flat=True)
+        )
+        # Самые активные авторы — не обязательно первые созданные.
+        self.rng.shuffle(authors)
+        return authors
+
+    def create_groups(self, count):
+        last_id = Group.objects.order_by('-id').values_list(
+            'id', flat=True
+        ).first() or 0
+        Group.objects.bulk_create(
+            (
+                Group(
+                    title=self.faker.catch_phrase()[:MAX_LENGTH],
+                    slug=f'group-{self.seed}-{number}',
+                    description=self.faker.paragraph(),
+                )
+                for number in range(count)
+            )
+        )
+        groups = list(
+            Group.objects.filter(id__gt=last_id).order_by('id')
+            .values_list('id', flat=True)
+        )
+        self.rng.shuffle(groups)
+        return groups
+
+    def rows(self, total, hours):
+        """Посты по порядку pub_date: id растут вместе с датой."""
+        rng = self.rng
+        author_weights = power_law(len(self.authors), AUTHOR_SKEW)
+        group_weights = power_law(len(self.groups), GROUP_SKEW)
+        counts = spread(rng, total, hourly_weights(rng, hours))
+        for hour, count in enumerate(counts):
+            if not count:
+                continue
+            base = self.start + timedelta(hours=hour)
+            seconds = sorted(rng.random() * 3600 for _ in range(count))
+            authors = rng.choices(
+                self.authors, cum_weights=author_weights, k=count
+            )
+            groups = rng.choices(
+                self.groups, cum_weights=group_weights, k=count
+            ) if self.groups else [None] * count
+            for second, author_id, group_id in zip(seconds, authors, groups):
+                text = ' '.join(rng.choices(
+                    self.sentences, k=rng.randint(*SENTENCES_PER_POST)
+                ))
+                if rng.random() < NO_GROUP_SHARE:
+                    group_id = None
+                yield (
+                    text, base + timedelta(seconds=second), author_id,
+                    group_id,
+                )
+
+    def insert(self, total, hours, started):
+        self.inserted = 0
+        rows = self.rows(total, hours)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            with transaction.atomic():
+                insert_posts(batch)
+            self.inserted += len(batch)
+            elapsed = max(time.monotonic() - started, 1e-6)
+            self.stdout.write(
+                f'Вставлено {self.inserted} из {total} '
+                f'({self.inserted / elapsed:.0f} постов/с)'
+            )
@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:21
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def stamp_site(apps, schema_editor):
+    # Отметка всего сайта входит в версию каждой страницы: с ней
+    # Last-Modified не уходит в 1970 год для лент, которые ещё не менялись.
+    FeedVersion = apps.get_model('posts', 'FeedVersion')
+    FeedVersion.objects.using(schema_editor.connection.alias).get_or_create(
+        feed='site', defaults={'changed': timezone.now()}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feed', models.CharField(max_length=200, unique=True, verbose_name='Лента')),
+                ('changed', models.DateTimeField(verbose_name='Последнее изменение')),
+            ],
+        ),
+        migrations.RunPython(stamp_site, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_feed_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='authorshard',
+            name='moving_to',
+            field=models.CharField(blank=True, max_length=200, verbose_name='Переносится в базу'),
+        ),
+    ]
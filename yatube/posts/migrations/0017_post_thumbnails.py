@@ -0,0 +1,56 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:33
+
+import json
+
+from django.db import DEFAULT_DB_ALIAS, migrations, models
+from django.utils import timezone
+
+# Имя и приоритет задачи posts.thumbnails.make_thumbnails записаны
+# здесь как есть: миграция не импортирует код приложения.
+MAKE_THUMBNAILS = 'posts.thumbnails.make_thumbnails'
+MAKE_THUMBNAILS_PRIORITY = 5
+
+
+def requeue_thumbnails(apps, schema_editor):
+    # У готовых картинок не записаны адреса миниатюр: пусть воркер
+    # сделает их заново (sorl возьмёт файлы из своего хранилища).
+    alias = schema_editor.connection.alias
+    Post = apps.get_model('posts', 'Post')
+    Task = apps.get_model('tasks', 'Task')
+    now = timezone.now()
+    ready = Post.objects.using(alias).filter(
+        thumbnails_ready=True
+    ).exclude(image='').values_list('pk', 'image')
+    # Очередь задач живёт только на default, даже для постов шарда.
+    Task.objects.using(DEFAULT_DB_ALIAS).bulk_create(
+        Task(
+            name=MAKE_THUMBNAILS,
+            arguments=json.dumps(
+                {'args': [pk, image, alias], 'kwargs': {}}
+            ),
+            priority=MAKE_THUMBNAILS_PRIORITY,
+            run_at=now,
+        )
+        for pk, image in ready.iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_authorshard_moving_to'),
+        ('tasks', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails',
+            field=models.TextField(blank=True, editable=False, verbose_name='Миниатюры'),
+        ),
+        migrations.RunPython(requeue_thumbnails, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='post',
+            name='thumbnails_ready',
+        ),
+    ]
@@ -1,6 +1,10 @@
+import json
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .sharding import post_shards, shard_for_author
+
 User = get_user_model()
 
 MAX_LENGTH = 200
@@ -21,12 +25,55 @@ class Group(models.Model):
         return self.title
 
 
+class PostManager(models.Manager):
+    """Менеджер постов, который знает про шарды (posts.sharding)."""
+
+    def create(self, **kwargs):
+        if not post_shards():
+            return super().create(**kwargs)
+        # QuerySet.create() выбирает базу без подсказки instance;
+        # save() без using спросит роутер уже с автором поста.
+        post = self.model(**kwargs)
+        post.save(force_insert=True, using=self._db)
+        return post
+
+    def for_author(self, author_id):
+        """Queryset по шарду автора; без шардирования — обычный."""
+        return self.using(shard_for_author(author_id))
+
+    def on_shards(self, **filters):
+        """По queryset'у на каждый шард, где могут быть такие посты.
+
+        Посты одного автора всегда в одном шарде, поэтому фильтр
+        по автору сужает выбор до него.
+        """
+        if not post_shards():
+            return [self.filter(**filters)]
+        author = filters.get('author', filters.get('author_id'))
+        if author is not None:
+            author_id = getattr(author, 'pk', author)
+            return [self.for_author(author_id).filter(**filters)]
+        return [self.using(alias).filter(**filters) for alias in post_shards()]
+
+    def locate(self, pk):
+        """Пост по id, в каком бы шарде он ни лежал, или None."""
+        for queryset in self.on_shards(pk=pk):
+            post = queryset.first()
+            if post is not None:
+                return post
+        return None
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст статьи')
     pub_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Дата публикации'
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -40,10 +87,138 @@ class Post(models.Model):
         on_delete=models.SET_NULL,
         verbose_name='Группа статей'
     )
+    image = models.ImageField(
+        upload_to='posts/',
+        blank=True,
+        verbose_name='Картинка'
+    )
+    # Готовые миниатюры, JSON-список {url, width, height}: их делает
+    # задача posts.thumbnails.make_thumbnails, а карточка только читает.
+    # Пока список пуст, карточка показывает заглушку.
+    thumbnails = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Миниатюры'
+    )
+
+    objects = PostManager()
 
     class Meta:
-        ordering = ['-pub_date']
+        ordering = ['-pub_date', 'id']
         default_related_name = 'posts'
+        indexes = [
+            models.Index(
+                fields=['author', '-pub_date'],
+                name='post_author_pub_date_idx',
+            ),
+            models.Index(
+                fields=['group', '-pub_date'],
+                name='post_group_pub_date_idx',
+            ),
+            models.Index(
+                fields=['-pub_date', 'id'],
+                name='post_pub_date_id_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
+
+    @property
+    def thumbnails_ready(self):
+        return bool(self.thumbnails)
+
+    @property
+    def thumbnail_variants(self):
+        """Миниатюры для srcset, от узкой к широкой."""
+        return json.loads(self.thumbnails) if self.thumbnails else []
+
+
+class AuthorCounter(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='post_counter',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов'
+    )
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
+
+
+class ImportCheckpoint(models.Model):
+    name = models.CharField(
+        max_length=MAX_LENGTH,
+        unique=True,
+        verbose_name='Задание импорта'
+    )
+    position = models.BigIntegerField(
+        default=0,
+        verbose_name='Обработано записей'
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+
+    def __str__(self):
+        return f'{self.name}: {self.position}'
+
+
+class AuthorShard(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='post_shard',
+        verbose_name='Автор'
+    )
+    alias = models.CharField(
+        max_length=MAX_LENGTH,
+        verbose_name='База с постами'
+    )
+    moving_to = models.CharField(
+        max_length=MAX_LENGTH,
+        blank=True,
+        verbose_name='Переносится в базу'
+    )
+
+    def __str__(self):
+        return f'{self.author}: {self.alias}'
+
+
+class IdSequence(models.Model):
+    name = models.CharField(
+        max_length=MAX_LENGTH,
+        unique=True,
+        verbose_name='Последовательность'
+    )
+    last_value = models.BigIntegerField(
+        default=0,
+        verbose_name='Последнее выданное значение'
+    )
+
+    def __str__(self):
+        return f'{self.name}: {self.last_value}'
+
+
+class FeedVersion(models.Model):
+    """Когда менялась лента: общая для всех процессов отметка.
+
+    По ней считаются ETag и Last-Modified страниц и ключи кэша страниц,
+    поэтому запись из любого процесса (воркер, команда, другой
+    gunicorn-воркер) сразу видна всем.
+    """
+
+    feed = models.CharField(
+        max_length=MAX_LENGTH,
+        unique=True,
+        verbose_name='Лента'
+    )
+    changed = models.DateTimeField(verbose_name='Последнее изменение')
+
+    def __str__(self):
+        return f'{self.feed}: {self.changed}'
@@ -0,0 +1,190 @@
+import base64
+import heapq
+import json
+import re
+from itertools import islice
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+
+from .models import Post
+from .sharding import post_shards, shard_for_author
+from .utils import (
+    POST_LIMIT, SHARD_FEED_FIELDS, CursorPage, feed_posts, prefetch_feed
+)
+
+SEARCH_TABLE = 'posts_post_fts'
+
+# Внешний FTS5-индекс по тексту постов. Триггеры держат его в синхронном
+# состоянии с posts_post; IF NOT EXISTS позволяет вызывать установку
+# повторно, например после миграций, пересоздающих таблицу постов.
+SEARCH_INDEX_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        text,
+        content='posts_post',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {SEARCH_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+)
+
+
+def search_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install_search_index(using=connection, rebuild=False):
+    """Создаёт FTS5-индекс и триггеры, если их ещё нет."""
+    if not search_available(using):
+        return
+    with using.cursor() as cursor:
+        for statement in SEARCH_INDEX_SQL:
+            cursor.execute(statement)
+        if rebuild:
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) "
+                f"VALUES ('rebuild')"
+            )
+
+
+def drop_search_triggers(using=connection):
+    """Убирает триггеры индекса перед массовой вставкой постов.
+
+    Индекс отстаёт от таблицы, пока install_search_index(rebuild=True)
+    не вернёт триггеры и не перестроит его целиком.
+    """
+    if not search_available(using):
+        return
+    with using.cursor() as cursor:
+        for action in ('insert', 'delete', 'update'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{action}')
+
+
+def match_expression(query):
+    """Превращает пользовательский запрос в безопасное выражение MATCH.
+
+    Каждое слово берётся в кавычки, слова объединяются через AND,
+    поэтому операторы FTS5 из запроса не интерпретируются.
+    """
+    words = re.findall(r'\w+', query)
+    return ' '.join(f'"{word}"' for word in words)
+
+
+def search_subquery():
+    """SQL со всеми id постов, подходящих под выражение MATCH %s."""
+    return (
+        f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s'
+    )
+
+
+def encode_search_cursor(score, pk):
+    raw = json.dumps([score, pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_search_cursor(token):
+    if not token:
+        return None
+    try:
+        padding = '=' * (-len(token) % 4)
+        score, pk = json.loads(base64.urlsafe_b64decode(token + padding))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(score, (int, float)) or not isinstance(pk, int):
+        return None
+    return score, pk
+
+
+def search_posts(query, group=None, author=None, cursor=None,
+                 per_page=POST_LIMIT):
+    """Ищет посты по FTS5-индексу и отдаёт страницу по курсору.
+
+    Результаты упорядочены по релевантности bm25, курсор — пара
+    (релевантность, id) последнего поста на странице. С шардами
+    индекс каждого шарда опрашивается отдельно и выдачи сливаются
+    по релевантности; bm25 считается по статистике своего шарда,
+    поэтому порядок между шардами приблизительный.
+    """
+    expression = match_expression(query)
+    if not expression or not search_available():
+        return CursorPage([])
+
+    where = []
+    params = [expression]
+    if group is not None:
+        where.append('post.group_id = %s')
+        params.append(group.pk)
+    if author is not None:
+        where.append('post.author_id = %s')
+        params.append(author.pk)
+    position = decode_search_cursor(cursor)
+    if position is not None:
+        where.append(
+            '(found.score > %s OR (found.score = %s AND found.id > %s))'
+        )
+        params.extend([position[0], position[0], position[1]])
+    params.append(per_page + 1)
+
+    sql = (
+        f'SELECT found.score, found.id FROM ('
+        f'SELECT rowid AS id, bm25({SEARCH_TABLE}) AS score '
+        f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s'
+        f') AS found JOIN posts_post AS post ON post.id = found.id '
+        + ('WHERE ' + ' AND '.join(where) + ' ' if where else '')
+        + 'ORDER BY found.score, found.id LIMIT %s'
+    )
+    shards = post_shards()
+    if not shards:
+        aliases = [DEFAULT_DB_ALIAS]
+    elif author is not None:
+        aliases = [shard_for_author(author.pk)]
+    else:
+        aliases = shards
+    found = []
+    for alias in aliases:
+        with connections[alias].cursor() as db_cursor:
+            db_cursor.execute(sql, params)
+            found.append([(*row, alias) for row in db_cursor.fetchall()])
+    rows = list(islice(heapq.merge(*found), per_page + 1))
+
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    posts = {}
+    if not shards:
+        posts = feed_posts().in_bulk([pk for _, pk, _ in rows])
+    else:
+        for alias in {alias for *_, alias in rows}:
+            posts.update(
+                Post.objects.using(alias).only(*SHARD_FEED_FIELDS).in_bulk(
+                    [pk for _, pk, row_alias in rows if row_alias == alias]
+                )
+            )
+        prefetch_feed(list(posts.values()))
+    return CursorPage(
+        [posts[pk] for _, pk, _ in rows if pk in posts],
+        next_cursor=(
+            encode_search_cursor(rows[-1][0], rows[-1][1])
+            if has_next else None
+        ),
+    )
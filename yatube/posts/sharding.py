@@ -0,0 +1,170 @@
+"""Шардирование постов по автору.
+
+Включается настройкой POST_SHARDS — списком алиасов баз. Все посты
+одного автора лежат в одном шарде; где чей шард, записано в
+AuthorShard на основной базе. Пользователи, группы, счётчики и прочие
+модели остаются на default, поэтому связи с ними из шардов читаются
+отдельными запросами (prefetch), а не JOIN. id постов выдаёт общая
+последовательность IdSequence, чтобы они не пересекались между шардами.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F, Max
+
+POST_SEQUENCE = 'posts.Post'
+POST_MODEL = 'posts.Post'
+
+
+def post_shards():
+    """Алиасы шардов с постами; пустой список — шардирования нет."""
+    return getattr(settings, 'POST_SHARDS', [])
+
+
+def sharding_enabled():
+    return bool(post_shards())
+
+
+class AuthorMoving(Exception):
+    """Посты автора сейчас переносятся в другой шард: писать их нельзя."""
+
+
+def default_shard(author_id):
+    shards = post_shards()
+    return shards[author_id % len(shards)]
+
+
+def _directory_entry(author_id, place):
+    """(алиас шарда, куда переносятся посты или '') из справочника.
+
+    Справочник читается из базы при каждом вызове: move_author меняет
+    его из другого процесса, и локальная копия в кэше осталась бы
+    старой.
+    """
+    from .models import AuthorShard
+    directory = AuthorShard.objects.using(DEFAULT_DB_ALIAS)
+    entry = directory.filter(author_id=author_id).values_list(
+        'alias', 'moving_to'
+    ).first()
+    if entry is not None:
+        return entry
+    alias = default_shard(author_id)
+    if place:
+        directory.get_or_create(author_id=author_id, defaults={'alias': alias})
+    return alias, ''
+
+
+def shard_for_author(author_id, place=False):
+    """Алиас шарда с постами автора; без шардирования — None.
+
+    place=True записывает автора в справочник, если его там ещё нет:
+    так первый же пост закрепляет шард, даже если список шардов потом
+    поменяется.
+    """
+    if not sharding_enabled() or author_id is None:
+        return None
+    alias, _ = _directory_entry(author_id, place)
+    return alias
+
+
+def writable_shard(author_id):
+    """Шард, куда писать пост автора; во время переноса — AuthorMoving."""
+    alias, moving_to = _directory_entry(author_id, place=True)
+    if moving_to:
+        raise AuthorMoving(
+            f'Посты автора {author_id} переносятся из {alias} в {moving_to}'
+        )
+    return alias
+
+
+def start_move(author_id, target):
+    """Закрывает посты автора на запись до assign_shard или cancel_move.
+
+    Возвращает шард, в котором посты лежат сейчас.
+    """
+    from .models import AuthorShard
+    source = writable_shard(author_id)
+    AuthorShard.objects.using(DEFAULT_DB_ALIAS).filter(
+        author_id=author_id
+    ).update(moving_to=target)
+    return source
+
+
+def cancel_move(author_id):
+    """Снова открывает запись в прежний шард, если перенос не удался."""
+    from .models import AuthorShard
+    AuthorShard.objects.using(DEFAULT_DB_ALIAS).filter(
+        author_id=author_id
+    ).update(moving_to='')
+
+
+def assign_shard(author_id, alias):
+    """Переписывает автора на другой шард (посты переносит move_author)."""
+    from .models import AuthorShard
+    AuthorShard.objects.using(DEFAULT_DB_ALIAS).update_or_create(
+        author_id=author_id, defaults={'alias': alias, 'moving_to': ''}
+    )
+
+
+def allocate_post_id():
+    """Следующий id поста, общий для всех шардов."""
+    from .models import IdSequence, Post
+    sequences = IdSequence.objects.using(DEFAULT_DB_ALIAS)
+    with transaction.atomic(using=DEFAULT_DB_ALIAS):
+        updated = sequences.filter(name=POST_SEQUENCE).update(
+            last_value=F('last_value') + 1
+        )
+        if not updated:
+            # Первый пост после включения шардов: продолжаем после
+            # самого большого id во всех базах.
+            last_value = max(
+                Post.objects.using(alias).aggregate(last=Max('id'))['last']
+                or 0
+                for alias in [DEFAULT_DB_ALIAS, *post_shards()]
+            )
+            sequences.create(name=POST_SEQUENCE, last_value=last_value + 1)
+        return sequences.values_list('last_value', flat=True).get(
+            name=POST_SEQUENCE
+        )
+
+
+class ShardRouter:
+    """Посты — в шард автора, связанные с ними объекты — на default.
+
+    Запросы к постам без подсказки (лента целиком, поиск по id)
+    роутер не решает: для них менеджер Post.objects даёт по queryset'у
+    на шард (on_shards, locate).
+    """
+
+    def route(self, model, hints, write):
+        shards = post_shards()
+        if not shards:
+            return None
+        instance = hints.get('instance')
+        if model._meta.label != POST_MODEL:
+            if instance is not None and instance._state.db in shards:
+                return DEFAULT_DB_ALIAS
+            return None
+        if instance is None:
+            return None
+        if instance._meta.label == POST_MODEL:
+            if not write and instance._state.db in shards:
+                return instance._state.db
+            if write and instance.author_id is not None:
+                return writable_shard(instance.author_id)
+            return shard_for_author(instance.author_id)
+        if instance._meta.label == settings.AUTH_USER_MODEL:
+            # author.posts: все посты автора в его шарде.
+            return shard_for_author(instance.pk, place=write)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self.route(model, hints, write=False)
+
+    def db_for_write(self, model, **hints):
+        return self.route(model, hints, write=True)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        shards = post_shards()
+        if obj1._state.db in shards or obj2._state.db in shards:
+            return True
+        return None
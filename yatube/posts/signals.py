@@ -0,0 +1,165 @@
+from django.db import connections
+from django.db.models.signals import (
+    post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from .cache import (
+    forget_feeds, group_feed, index_feed, post_feed, profile_feed,
+    purge_site, touch_feeds
+)
+from .counters import change_post_count
+from .models import Group, Post, User
+from .search import install_search_index
+from .sharding import allocate_post_id, post_shards, sharding_enabled
+from .thumbnails import schedule_thumbnails
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_relations(sender, instance, raw, **kwargs):
+    """Запоминает прежних автора, группу и картинку до правки."""
+    instance._previous_author_id = None
+    instance._previous_group_id = None
+    instance._previous_image = ''
+    # База, из которой пост прочитан: с шардами она может смениться.
+    instance._previous_db = instance._state.db
+    if raw or instance._state.adding:
+        return
+    previous = (
+        Post.objects.using(instance._state.db).filter(pk=instance.pk)
+        .values_list('author_id', 'group_id', 'image')
+        .first()
+    )
+    if previous is not None:
+        (
+            instance._previous_author_id,
+            instance._previous_group_id,
+            instance._previous_image,
+        ) = previous
+
+
+@receiver(pre_save, sender=Post)
+def reset_thumbnails(sender, instance, raw, **kwargs):
+    """Новой картинке нужны новые миниатюры: до них — заглушка."""
+    if not raw and instance.image.name != instance._previous_image:
+        instance.thumbnails = ''
+
+
+@receiver(pre_save, sender=Post)
+def allocate_sharded_post_id(sender, instance, raw, **kwargs):
+    """С шардами id нового поста выдаёт общая последовательность."""
+    if not raw and instance.pk is None and sharding_enabled():
+        instance.pk = allocate_post_id()
+
+
+def forget_moved_post(post, previous_db):
+    """Удаляет строку поста из прежнего шарда без сигналов."""
+    with connections[previous_db].cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {Post._meta.db_table} WHERE id = %s', [post.pk]
+        )
+
+
+def touch_post_feeds(post, listed=False, previous_author_id=None,
+                     previous_group_id=None):
+    """Отмечает изменение лент и поста во всех процессах.
+
+    listed=True — пост появился в лентах или пропал из них: двигаются
+    отметки главной, автора и группы, а с ними ETag и ключи всех их
+    страниц. Правка двигает только отметку поста, и меняются лишь
+    страницы, где он показан; смена автора или группы ещё меняет
+    состав прежней и новой ленты автора или группы.
+    """
+    feeds = [post_feed(post.pk)]
+    if listed:
+        feeds += [index_feed(), profile_feed(post.author.username)]
+        if post.group_id:
+            feeds.append(group_feed(post.group.slug))
+    if (
+        not listed and previous_author_id
+        and previous_author_id != post.author_id
+    ):
+        feeds.append(profile_feed(post.author.username))
+        feeds.extend(
+            profile_feed(username) for username in User.objects.filter(
+                pk=previous_author_id
+            ).values_list('username', flat=True)
+        )
+    if not listed and previous_group_id != post.group_id:
+        feeds.extend(
+            group_feed(slug) for slug in Group.objects.filter(
+                pk__in=[post.group_id, previous_group_id]
+            ).values_list('slug', flat=True)
+        )
+    touch_feeds(*feeds)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw, using, **kwargs):
+    if raw:
+        return
+    previous_db = getattr(instance, '_previous_db', None)
+    if created and previous_db in post_shards() and previous_db != using:
+        # Смена автора перенесла пост в другой шард: там он вставлен
+        # заново, но для счётчиков это правка, а не новый пост.
+        forget_moved_post(instance, previous_db)
+        created = False
+    touch_post_feeds(
+        instance,
+        created,
+        getattr(instance, '_previous_author_id', None),
+        getattr(instance, '_previous_group_id', None),
+    )
+    if instance.image and not instance.thumbnails_ready:
+        schedule_thumbnails(instance, using)
+    if created:
+        change_post_count(instance.author_id, 1)
+        return
+
+    previous_author_id = getattr(instance, '_previous_author_id', None)
+    if previous_author_id and previous_author_id != instance.author_id:
+        change_post_count(previous_author_id, -1)
+        change_post_count(instance.author_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    touch_post_feeds(instance, listed=True)
+    forget_feeds(post_feed(instance.pk))
+    change_post_count(instance.author_id, -1)
+
+
+@receiver(pre_delete, sender=User)
+def delete_sharded_posts(sender, instance, **kwargs):
+    """Каскадное удаление Django не видит постов в шардах."""
+    if sharding_enabled():
+        Post.objects.for_author(instance.pk).filter(author=instance).delete()
+
+
+@receiver(pre_delete, sender=Group)
+def unlink_sharded_posts(sender, instance, **kwargs):
+    """SET_NULL для постов группы во всех шардах."""
+    if sharding_enabled():
+        for queryset in Post.objects.on_shards(group=instance):
+            queryset.update(group=None)
+
+
+@receiver(post_save, sender=Group)
+def touch_renamed_group(sender, instance, created, raw, **kwargs):
+    """Название группы видно в карточках постов на любых страницах."""
+    if not created and not raw:
+        purge_site()
+
+
+@receiver(post_save, sender=User)
+def touch_renamed_user(sender, instance, created, raw, update_fields,
+                       **kwargs):
+    """Имя автора видно в карточках; вход на сайт страниц не меняет."""
+    if created or raw or update_fields == frozenset({'last_login'}):
+        return
+    purge_site()
+
+
+def install_post_search_index(sender, using, **kwargs):
+    """Возвращает триггеры поиска, если миграция пересоздала posts_post."""
+    install_search_index(connections[using])
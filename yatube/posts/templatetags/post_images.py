@@ -0,0 +1,23 @@
+from django import template
+
+register = template.Library()
+
+# Какую ширину картинка занимает в вёрстке: карточка ленты — колонка
+# контейнера, страница поста — три четверти ширины на широком экране.
+IMAGE_SIZES = {
+    'card': '(max-width: 576px) 100vw, 640px',
+    'detail': '(max-width: 768px) 100vw, 75vw',
+}
+
+
+@register.inclusion_tag('includes/post_image.html')
+def post_image(post, layout='card'):
+    """Картинка поста с srcset из миниатюр или заглушка, пока их нет.
+
+    Миниатюры уже записаны в посте: рендер не трогает ни sorl, ни базу.
+    """
+    return {
+        'post': post,
+        'sizes': IMAGE_SIZES[layout],
+        'thumbnails': post.thumbnail_variants if post.image else [],
+    }
@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.tests.test_constant import (
+    AUTH, TEST_NAME, TEST_SLUG, TEST_DISCRIP, TEST_POST
+)
+
+CHANGELIST = 'admin:posts_post_changelist'
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        for count in range(3):
+            Group.objects.create(
+                title=f'{TEST_NAME} {count}',
+                slug=f'{TEST_SLUG}-{count}',
+                description=TEST_DISCRIP,
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def add_posts(self, count):
+        groups = list(Group.objects.all())
+        for number in range(count):
+            author = User.objects.create_user(
+                username=f'{AUTH} {Post.objects.count()}'
+            )
+            Post.objects.create(
+                text=TEST_POST,
+                author=author,
+                group=groups[number % len(groups)],
+            )
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(CHANGELIST))
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка постов не зависит от числа строк."""
+        self.add_posts(3)
+        cache.clear()
+        few = self.changelist_queries()
+        self.add_posts(6)
+        cache.clear()
+        self.assertEqual(self.changelist_queries(), few)
+
+    def test_changelist_count_is_cached(self):
+        """Повторный показ списка не пересчитывает все посты."""
+        self.add_posts(2)
+        first = self.changelist_queries()
+        self.assertEqual(self.changelist_queries(), first - 1)
@@ -0,0 +1,113 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.utils import POST_LIMIT
+from posts.tests.test_constant import (
+    AUTH, TEST_NAME, TEST_SLUG, TEST_DISCRIP, TEST_POST, TEST_OF_POST
+)
+
+
+class PostsApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTH)
+        cls.group = Group.objects.create(
+            title=TEST_NAME, slug=TEST_SLUG, description=TEST_DISCRIP
+        )
+        cls.posts = [
+            Post.objects.create(
+                text=f'{TEST_POST} {number}',
+                author=cls.user,
+                group=cls.group,
+            )
+            for number in range(TEST_OF_POST)
+        ]
+        cls.feed_urls = [
+            reverse('posts:api_index'),
+            reverse('posts:api_group_list', args=[TEST_SLUG]),
+            reverse('posts:api_profile', args=[AUTH]),
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feeds_walk_by_cursor(self):
+        """По ссылкам next лента проходится целиком и без повторов."""
+        for url in self.feed_urls:
+            with self.subTest(url=url):
+                ids = []
+                while url:
+                    data = self.client.get(url).json()
+                    ids.extend(post['id'] for post in data['results'])
+                    url = data['next']
+                self.assertEqual(
+                    ids, [post.id for post in reversed(self.posts)]
+                )
+
+    def test_sparse_fields(self):
+        """?fields= оставляет в ответе только запрошенные поля."""
+        post = self.posts[0]
+        data = self.client.get(
+            reverse('posts:api_post_detail', args=[post.id]),
+            {'fields': 'text,author,group'},
+        ).json()
+        self.assertEqual(
+            data, {'text': post.text, 'author': AUTH, 'group': TEST_SLUG}
+        )
+        data = self.client.get(
+            reverse('posts:api_index'), {'fields': 'id', 'limit': 3}
+        ).json()
+        self.assertEqual(data['results'], [
+            {'id': post.id} for post in reversed(self.posts[-3:])
+        ])
+
+    def test_group_and_profile_headers(self):
+        """Лента группы и профиля отдаёт группу и автора."""
+        data = self.client.get(self.feed_urls[1]).json()
+        self.assertEqual(data['group']['title'], TEST_NAME)
+        data = self.client.get(self.feed_urls[2]).json()
+        self.assertEqual(data['author']['username'], AUTH)
+        self.assertEqual(data['author']['posts_count'], TEST_OF_POST)
+
+    def test_authorized_feeds_fit_budget(self):
+        """Вошедший пользователь укладывается в бюджет API."""
+        self.client.force_login(self.user)
+        for url in self.feed_urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(
+                    len(response.json()['results']),
+                    min(TEST_OF_POST, POST_LIMIT),
+                )
+
+    def test_errors_are_json(self):
+        """Ошибки API приходят в JSON с подходящим статусом."""
+        cases = {
+            reverse('posts:api_index') + '?fields=password':
+                HTTPStatus.BAD_REQUEST,
+            reverse('posts:api_index') + '?limit=0': HTTPStatus.BAD_REQUEST,
+            reverse('posts:api_group_list', args=['nope']):
+                HTTPStatus.NOT_FOUND,
+            reverse('posts:api_profile', args=['nope']): HTTPStatus.NOT_FOUND,
+            reverse('posts:api_post_detail', args=[0]): HTTPStatus.NOT_FOUND,
+        }
+        for url, status in cases.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status)
+                self.assertIn('detail', response.json())
+
+    def test_feed_queries(self):
+        """Страница ленты API — версии и выборка постов (и группа/автор)."""
+        for url, queries in zip(self.feed_urls, (2, 3, 3)):
+            with self.subTest(url=url):
+                cache.clear()
+                self.client.get(url)
+                with self.assertNumQueries(queries):
+                    self.client.get(url + '?fields=id,text')
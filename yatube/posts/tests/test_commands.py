@@ -0,0 +1,205 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import (
+    AuthorCounter, Group, ImportCheckpoint, Post, User
+)
+from posts.search import search_posts
+from posts.tests.test_constant import (
+    AUTH, TEST_SLUG, TEST_NAME, TEST_DISCRIP, TEST_POST, TEXT_POST
+)
+
+
+class ImportPostsCommandTests(TestCase):
+    def setUp(self):
+        handle, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def write_records(self, records, mode='w'):
+        with open(self.path, mode, encoding='utf-8') as source:
+            for record in records:
+                source.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def import_posts(self, *args):
+        call_command(
+            'import_posts', *args, stdout=StringIO(), stderr=StringIO()
+        )
+
+    def test_import_jsonl_and_resume(self):
+        """Импорт пачками, пропуск битых записей и продолжение."""
+        self.write_records([
+            {'text': 'Пост 1', 'author': AUTH, 'group': TEST_SLUG,
+             'pub_date': '2020-01-02T03:04:05+00:00'},
+            {'text': 'Пост 2', 'author': AUTH},
+            {'text': 'Без автора'},
+        ])
+        self.import_posts(self.path, '--batch-size', '2')
+
+        self.assertEqual(Post.objects.count(), 2)
+        post = Post.objects.get(text='Пост 1')
+        self.assertEqual(post.pub_date.year, 2020)
+        self.assertEqual(post.group, Group.objects.get(slug=TEST_SLUG))
+        author = User.objects.get(username=AUTH)
+        self.assertEqual(
+            AuthorCounter.objects.get(author=author).posts_count, 2
+        )
+
+        self.write_records([{'text': 'Пост 3', 'author': AUTH}], mode='a')
+        self.import_posts(self.path)
+        self.assertEqual(Post.objects.count(), 3)
+
+        self.import_posts(self.path, '--restart')
+        self.assertEqual(Post.objects.count(), 6)
+
+    def test_import_csv_from_stdin(self):
+        """Импорт CSV из стандартного ввода."""
+        data = 'text,author,group\nПост из CSV,' + AUTH + ',\n'
+        with mock.patch('sys.stdin', StringIO(data)):
+            self.import_posts('-', '--format', 'csv')
+        self.assertTrue(
+            Post.objects.filter(text='Пост из CSV', author__username=AUTH)
+            .exists()
+        )
+
+    def test_stdin_without_job_is_not_resumed(self):
+        """Разные импорты из stdin без --job не делят чекпоинт."""
+        for text in ('Первый поток', 'Второй поток'):
+            data = json.dumps({'text': text, 'author': AUTH}) + '\n'
+            with mock.patch('sys.stdin', StringIO(data)):
+                self.import_posts('-', '--format', 'jsonl')
+            self.assertTrue(Post.objects.filter(text=text).exists())
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+    def test_malformed_lines_are_skipped(self):
+        """Битый JSON и не-объекты пропускаются с номером строки."""
+        with open(self.path, 'w', encoding='utf-8') as source:
+            source.write(
+                '{"text": "Пост 1", "author": "' + AUTH + '"}\n'
+                '{не json\n'
+                '\n'
+                '["список"]\n'
+                '{"text": 5, "author": "' + AUTH + '"}\n'
+                '{"text": "Пост 2", "author": "' + AUTH + '"}\n'
+            )
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_posts', self.path, stdout=stdout, stderr=stderr)
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertIn('пропущено 3', stdout.getvalue())
+        for line in ('Строка 2', 'Строка 4', 'Строка 5'):
+            self.assertIn(line, stderr.getvalue())
+
+    def test_batch_size_must_be_positive(self):
+        """Пачка меньше одного поста отклоняется до импорта."""
+        self.write_records([{'text': 'Пост 1', 'author': AUTH}])
+        for batch_size in ('0', '-1'):
+            with self.subTest(batch_size=batch_size):
+                with self.assertRaises(CommandError):
+                    self.import_posts(self.path, '--batch-size', batch_size)
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(ImportCheckpoint.objects.exists())
+
+
+class ExportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTH)
+        cls.group = Group.objects.create(
+            title=TEST_NAME, slug=TEST_SLUG, description=TEST_DISCRIP
+        )
+        Post.objects.create(text=TEST_POST, author=cls.user, group=cls.group)
+        Post.objects.create(text=TEXT_POST, author=cls.user)
+
+    def test_export_command_jsonl(self):
+        """Команда выгружает посты группы в JSON Lines."""
+        stdout = StringIO()
+        call_command('export_posts', '--group', TEST_SLUG, stdout=stdout)
+        records = [
+            json.loads(line) for line in stdout.getvalue().splitlines()
+        ]
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]['text'], TEST_POST)
+        self.assertEqual(records[0]['author'], AUTH)
+        self.assertEqual(records[0]['group'], TEST_SLUG)
+
+    def test_export_views_stream(self):
+        """Выгрузки лент отдаются потоком в JSON Lines и CSV."""
+        urls_lines = {
+            reverse('posts:export', args=['jsonl']): 2,
+            reverse('posts:group_export', args=[TEST_SLUG, 'csv']): 2,
+            reverse('posts:profile_export', args=[AUTH, 'csv']): 3,
+        }
+        for url, lines in urls_lines.items():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertTrue(response.streaming)
+                content = b''.join(response.streaming_content).decode()
+                self.assertEqual(len(content.splitlines()), lines)
+        response = self.client.get(reverse('posts:export', args=['xml']))
+        self.assertEqual(response.status_code, 404)
+
+
+class SeedPostsCommandTests(TestCase):
+    def seed(self, *args):
+        call_command(
+            'seed_posts', '--users', '20', '--groups', '5', '--posts', '500',
+            '--days', '10', '--end', '2021-01-11', '--batch-size', '200',
+            *args, stdout=StringIO(),
+        )
+
+    def snapshot(self):
+        return list(Post.objects.order_by('id').values_list(
+            'text', 'pub_date', 'author__username', 'group__slug'
+        ))
+
+    def test_seed_is_reproducible(self):
+        """Одинаковый seed на пустой базе даёт те же данные."""
+        self.seed('--seed', '3')
+        first = self.snapshot()
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        Group.objects.all().delete()
+        self.seed('--seed', '3')
+        self.assertEqual(self.snapshot(), first)
+        with self.assertRaises(CommandError):
+            self.seed('--seed', '3')
+
+    def test_seed_data(self):
+        """Посты в заданном периоде, по порядку дат, с перекосом авторов."""
+        self.seed()
+        self.assertEqual(Post.objects.count(), 500)
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Group.objects.count(), 5)
+        dates = list(
+            Post.objects.order_by('id').values_list('pub_date', flat=True)
+        )
+        self.assertEqual(dates, sorted(dates))
+        self.assertEqual(
+            {(date.year, date.month) for date in dates}, {(2021, 1)}
+        )
+        top_author = AuthorCounter.objects.order_by('-posts_count').first()
+        self.assertGreater(top_author.posts_count, 500 / 20 * 2)
+        self.assertEqual(
+            sum(AuthorCounter.objects.values_list('posts_count', flat=True)),
+            500,
+        )
+        word = Post.objects.first().text.split()[0]
+        self.assertTrue(search_posts(word).object_list)
+
+    def test_batch_size_must_be_positive(self):
+        """Пустая пачка не выдаётся за успешную загрузку."""
+        for batch_size in ('0', '-1'):
+            with self.subTest(batch_size=batch_size):
+                with self.assertRaises(CommandError):
+                    self.seed('--batch-size', batch_size)
+        self.assertFalse(User.objects.exists())
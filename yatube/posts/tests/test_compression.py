@@ -0,0 +1,82 @@
+import gzip
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from core.compression import variant_key
+from core.middleware import MIN_COMPRESS_LENGTH
+from posts.cache import (
+    feed_stamps, index_feed, page_key, post_feed, site_feed
+)
+from posts.models import Post, User
+from posts.utils import POST_LIMIT
+from posts.tests.test_constant import (
+    AUTH, INDEX, NEW_TEXT_POST, TEST_OF_POST, TEST_POST
+)
+
+
+class CompressionMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTH)
+        for number in range(TEST_OF_POST):
+            Post.objects.create(text=f'{TEST_POST} {number}', author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, url, encoding='gzip, deflate'):
+        return self.client.get(url, HTTP_ACCEPT_ENCODING=encoding)
+
+    def test_page_compressed_and_variant_cached(self):
+        """Страница сжимается, сжатая копия кэшируется рядом с ней."""
+        # Первый запрос узнаёт, какие посты на странице.
+        self.get(reverse(INDEX))
+        response = self.get(reverse(INDEX))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(TEST_POST, gzip.decompress(response.content).decode())
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content)
+        )
+
+        stamps = feed_stamps(index_feed(), site_feed(), *(
+            post_feed(post.pk) for post in Post.objects.all()[:POST_LIMIT]
+        ))
+        key = variant_key(page_key(index_feed(), 'page:1', stamps), 'gzip')
+        self.assertEqual(cache.get(key), response.content)
+        self.assertEqual(self.get(reverse(INDEX)).content, response.content)
+        Post.objects.create(text=NEW_TEXT_POST, author=self.user)
+        response = self.get(reverse(INDEX))
+        self.assertIn(
+            NEW_TEXT_POST, gzip.decompress(response.content).decode()
+        )
+
+    def test_identity_when_not_accepted(self):
+        """Без подходящего Accept-Encoding ответ не сжимается."""
+        for encoding in ('', 'identity', 'gzip;q=0'):
+            with self.subTest(encoding=encoding):
+                response = self.get(reverse(INDEX), encoding)
+                self.assertFalse(response.has_header('Content-Encoding'))
+                self.assertIn(TEST_POST, response.content.decode())
+
+    def test_small_response_not_compressed(self):
+        """Маленький ответ отдаётся как есть."""
+        post = Post.objects.first()
+        response = self.get(
+            reverse('posts:api_post_detail', args=[post.pk]) + '?fields=id'
+        )
+        self.assertLess(len(response.content), MIN_COMPRESS_LENGTH)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_streaming_response_compressed(self):
+        """Выгрузка сжимается потоком и распаковывается целиком."""
+        response = self.get(reverse('posts:export', args=['jsonl']))
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertFalse(response.has_header('Content-Length'))
+        lines = gzip.decompress(
+            b''.join(response.streaming_content)
+        ).decode().splitlines()
+        self.assertEqual(len(lines), TEST_OF_POST)
@@ -4,6 +4,7 @@ TEST_DESCRIP_GROUP = 'Тестовое описание группы'
 TEXT_POST = 'Тестовый пост'
 TEXT_POST_FORM = 'Тестовый пост формы'
 NEW_TEXT_POST = 'Новый текст поста'
+EDIT_TEXT_POST = 'Исправленный текст поста'
 TEST_POST = 'Текст статьи'
 TEST_GROUP = 'Группа статей'
 TEST_SLUG = 'Тестовый слаг'
@@ -18,6 +19,7 @@ TEST_DISCRIP = 'Тестовое описание'
 SLUG = 'slug'
 NO_AUTH = 'Не авторизованый пользователь'
 PAGE = "page"
+CURSOR = "cursor"
 USER_NAME = 'username'
 POST = 'post'
 POST_ID = 'post_id'
@@ -0,0 +1,60 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+
+from django.db import connections
+from django.test import SimpleTestCase
+
+from core.db.sqlite.base import PRAGMAS, DatabaseWrapper
+
+
+class ProductionSqliteTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'db.sqlite3')
+        settings_dict = {
+            **connections['default'].settings_dict,
+            'ENGINE': 'core.db.sqlite',
+            'NAME': self.path,
+            'CONN_MAX_AGE': 600,
+            'OPTIONS': {'pragmas': {'cache_size': -1024}},
+        }
+        self.wrapper = DatabaseWrapper(settings_dict, 'production')
+
+    def tearDown(self):
+        self.wrapper.close()
+        shutil.rmtree(self.directory)
+
+    def pragma(self, name):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_applied_on_connect(self):
+        """Соединение открывается в WAL с прагмами из настроек."""
+        self.assertEqual(self.pragma('journal_mode'), 'wal')
+        # synchronous=NORMAL хранится как 1.
+        self.assertEqual(self.pragma('synchronous'), 1)
+        self.assertEqual(self.pragma('busy_timeout'), PRAGMAS['busy_timeout'])
+        self.assertEqual(self.pragma('cache_size'), -1024)
+
+    def test_settings_not_mutated(self):
+        """Параметры соединения не трогают общий для потоков OPTIONS."""
+        options = self.wrapper.settings_dict['OPTIONS']
+        params = self.wrapper.get_connection_params()
+        self.assertNotIn('pragmas', params)
+        self.assertIs(self.wrapper.settings_dict['OPTIONS'], options)
+        self.assertEqual(options, {'pragmas': {'cache_size': -1024}})
+
+    def test_replaced_database_closes_connection(self):
+        """Подменённый файл базы не переживает проверку живости."""
+        self.wrapper.ensure_connection()
+        self.wrapper.close_if_unusable_or_obsolete()
+        self.assertIsNotNone(self.wrapper.connection)
+
+        os.remove(self.path)
+        sqlite3.connect(self.path).close()
+        self.assertFalse(self.wrapper.is_usable())
+        self.wrapper.close_if_unusable_or_obsolete()
+        self.assertIsNone(self.wrapper.connection)
@@ -0,0 +1,82 @@
+from http import HTTPStatus
+
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.tests.test_constant import (
+    AUTH, TEST_NAME, TEST_SLUG, TEST_DISCRIP, TEST_POST, TEXT_POST
+)
+
+
+class PostsFeedsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTH)
+        cls.group = Group.objects.create(
+            title=TEST_NAME, slug=TEST_SLUG, description=TEST_DISCRIP
+        )
+        Post.objects.create(text=TEST_POST, author=cls.user, group=cls.group)
+        cls.feed_urls = [
+            reverse('posts:feed_rss'),
+            reverse('posts:feed_atom'),
+            reverse('posts:group_feed_rss', args=[TEST_SLUG]),
+            reverse('posts:group_feed_atom', args=[TEST_SLUG]),
+            reverse('posts:profile_feed_rss', args=[AUTH]),
+            reverse('posts:profile_feed_atom', args=[AUTH]),
+        ]
+
+    def test_feeds_list_posts(self):
+        """Ленты RSS и Atom содержат посты."""
+        for url in self.feed_urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, TEST_POST)
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+
+    def test_feeds_conditional_get(self):
+        """Неизменившаяся лента отвечает 304 без выборки постов.
+
+        Два запроса: даты и id постов ленты и их отметки FeedVersion.
+        """
+        for url in self.feed_urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                with self.assertNumQueries(2):
+                    not_modified = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(
+                    not_modified.status_code, HTTPStatus.NOT_MODIFIED
+                )
+                not_modified = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(
+                    not_modified.status_code, HTTPStatus.NOT_MODIFIED
+                )
+
+    def test_new_post_changes_etag(self):
+        """Новый пост меняет ETag ленты."""
+        url = reverse('posts:feed_atom')
+        etag = self.client.get(url)['ETag']
+        Post.objects.create(text=TEXT_POST, author=self.user)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, TEXT_POST)
+
+    def test_edited_post_changes_etag(self):
+        """Правка не самого свежего поста меняет ETag, но не Last-Modified."""
+        url = reverse('posts:feed_atom')
+        old = Post.objects.get()
+        Post.objects.create(text=TEST_POST, author=self.user)
+        response = self.client.get(url)
+        old.text = TEXT_POST
+        old.save()
+        edited = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(edited.status_code, HTTPStatus.OK)
+        self.assertContains(edited, TEXT_POST)
+        self.assertEqual(edited['Last-Modified'], response['Last-Modified'])
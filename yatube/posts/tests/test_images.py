@@ -0,0 +1,141 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post, User
+from posts.utils import POST_LIMIT
+from posts.views import INDEX_QUERY_BUDGET
+from posts.thumbnails import THUMBNAIL_WIDTHS, make_thumbnails
+from posts.tests.test_constant import (
+    AUTH, DETAIL, EDIT, INDEX, POST_CREATE, TEXT_POST, EDIT_TEXT_POST
+)
+from tasks.models import Task
+
+MEDIA_ROOT = tempfile.mkdtemp()
+PLACEHOLDER = 'Картинка обрабатывается'
+
+
+def uploaded_image(name='photo.png', size=(1200, 800)):
+    content = BytesIO()
+    Image.new('RGB', size, 'lightskyblue').save(content, 'PNG')
+    return SimpleUploadedFile(name, content.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PostImageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTH)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self):
+        self.authorized_client.post(reverse(POST_CREATE), {
+            'text': TEXT_POST, 'image': uploaded_image(),
+        })
+        return Post.objects.get(text=TEXT_POST)
+
+    def test_placeholder_until_thumbnails_ready(self):
+        """Пока миниатюр нет, вместо картинки — заглушка."""
+        post = self.create_post()
+        self.assertTrue(post.image.name.startswith('posts/'))
+        self.assertFalse(post.thumbnails_ready)
+        for url in (reverse(INDEX), reverse(DETAIL, args=[post.pk])):
+            with self.subTest(url=url):
+                content = self.client.get(url).content.decode()
+                self.assertIn(PLACEHOLDER, content)
+                self.assertNotIn('srcset', content)
+
+    def test_srcset_after_thumbnails(self):
+        """Готовые миниатюры попадают в srcset карточки и поста."""
+        post = self.create_post()
+        make_thumbnails(post.pk, post.image.name, 'default')
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        for url in (reverse(INDEX), reverse(DETAIL, args=[post.pk])):
+            with self.subTest(url=url):
+                content = self.client.get(url).content.decode()
+                self.assertNotIn(PLACEHOLDER, content)
+                for width in THUMBNAIL_WIDTHS:
+                    self.assertIn(f' {width}w', content)
+
+    def test_image_feed_fits_query_budget(self):
+        """Лента из постов с картинками не ходит в sorl при рендере."""
+        for _ in range(POST_LIMIT):
+            post = self.create_post()
+            Post.objects.filter(pk=post.pk).update(text=EDIT_TEXT_POST)
+            make_thumbnails(post.pk, post.image.name, 'default')
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            content = self.client.get(reverse(INDEX)).content.decode()
+        self.assertLessEqual(len(queries), INDEX_QUERY_BUDGET)
+        self.assertNotIn('thumbnail_kvstore', str(queries.captured_queries))
+        self.assertEqual(content.count('srcset='), POST_LIMIT)
+
+    def test_worker_makes_thumbnails(self):
+        """Миниатюры делает воркер очереди задач."""
+        post = self.create_post()
+        self.assertTrue(
+            Task.objects.filter(name=make_thumbnails.task_name).exists()
+        )
+        call_command('run_tasks', '--burst', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+        self.assertFalse(Task.objects.exists())
+
+    def test_worker_refreshes_cached_pages(self):
+        """Воркер не трогает кэш страниц, а страница всё равно свежая.
+
+        Воркер — другой процесс со своим кэшем: о готовых миниатюрах
+        веб-процессы узнают по отметке поста в базе.
+        """
+        self.create_post()
+        self.client.get(reverse(INDEX))
+        response = self.client.get(reverse(INDEX))
+        self.assertContains(response, PLACEHOLDER)
+        with mock.patch('posts.cache.cache', None):
+            call_command('run_tasks', '--burst', stdout=StringIO())
+        response = self.client.get(
+            reverse(INDEX), HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertNotContains(response, PLACEHOLDER)
+        self.assertContains(response, 'srcset=')
+
+    def test_new_image_resets_thumbnails(self):
+        """Правка текста миниатюры не трогает, новая картинка сбрасывает."""
+        post = self.create_post()
+        make_thumbnails(post.pk, post.image.name, 'default')
+        edit_url = reverse(EDIT, args=[post.pk])
+        self.authorized_client.post(edit_url, {'text': EDIT_TEXT_POST})
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
+
+        previous_name = post.image.name
+        self.authorized_client.post(edit_url, {
+            'text': EDIT_TEXT_POST, 'image': uploaded_image('new.png'),
+        })
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnails_ready)
+        # Задача для старой картинки ничего не отмечает.
+        make_thumbnails(post.pk, previous_name, 'default')
+        post.refresh_from_db()
+        self.assertFalse(post.thumbnails_ready)
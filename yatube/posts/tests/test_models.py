@@ -1,6 +1,14 @@
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
 from django.test import TestCase
+from django.utils import timezone
 
-from posts.models import Group, Post, User
+from posts.models import AuthorCounter, Group, Post, User
+from posts.utils import CURSOR_ORDERING, POST_LIMIT, feed_posts
 from posts.tests.test_constant import (
     TEST_USER, AUTH, TEST_GROUP, TEST_SLUG, TEST_DESCRIPT, TEST_POST,
     GROUP, TEXT, AUTHOR
@@ -42,3 +50,71 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     post._meta.get_field(field).verbose_name, expected)
+
+
+class AuthorCounterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=TEST_USER)
+
+    def posts_count(self):
+        return AuthorCounter.objects.get(author=self.user).posts_count
+
+    def test_counter_follows_create_and_delete(self):
+        """Счётчик постов автора меняется при создании и удалении."""
+        first = Post.objects.create(author=self.user, text=TEST_POST)
+        Post.objects.create(author=self.user, text=TEST_POST)
+        self.assertEqual(self.posts_count(), 2)
+        first.delete()
+        self.assertEqual(self.posts_count(), 1)
+
+    def test_recount_posts_command(self):
+        """Команда recount_posts восстанавливает счётчики с нуля."""
+        Post.objects.bulk_create(
+            Post(author=self.user, text=TEST_POST) for _ in range(3)
+        )
+        call_command('recount_posts', stdout=StringIO())
+        self.assertEqual(self.posts_count(), 3)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN есть в SQLite')
+class PostIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=TEST_USER)
+        cls.group = Group.objects.create(
+            title=TEST_GROUP,
+            slug=TEST_SLUG,
+            description=TEST_DESCRIPT,
+        )
+
+    def query_plan(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return ' '.join(row[-1] for row in cursor.fetchall())
+
+    def test_feed_queries_use_indexes(self):
+        """Ленты читаются по составным индексам без сортировки."""
+        pub_date = timezone.now()
+        after_cursor = (
+            Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__gt=1)
+        )
+        feed_indexes = {
+            'post_pub_date_id_idx': feed_posts(),
+            'post_author_pub_date_idx': feed_posts(author=self.user),
+            'post_group_pub_date_idx': feed_posts(group=self.group),
+        }
+        for index, queryset in feed_indexes.items():
+            for feed in (
+                queryset[:POST_LIMIT],
+                queryset.filter(after_cursor).order_by(
+                    *CURSOR_ORDERING
+                )[:POST_LIMIT],
+            ):
+                with self.subTest(index=index):
+                    plan = self.query_plan(feed)
+                    self.assertIn(index, plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
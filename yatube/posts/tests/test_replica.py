@@ -0,0 +1,49 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core.db.routers import pin_primary
+from core.middleware import STICKY_COOKIE
+from posts.models import Post, User
+from posts.tests.test_constant import (
+    AUTH, INDEX, POST_CREATE, PROFILE, TEST_POST, NEW_TEXT_POST, TEXT
+)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReadReplicaTests(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username=AUTH)
+        Post.objects.create(text=TEST_POST, author=self.user)
+        # Записи из setUp не должны прилипать чтения теста к primary.
+        pin_primary(False)
+
+    def sync(self):
+        call_command('sync_replica', stdout=StringIO())
+
+    def test_reads_go_to_replica(self):
+        """Чтения идут с реплики и видят новое только после синхронизации."""
+        self.assertEqual(Post.objects.all().db, 'replica')
+        self.assertNotContains(self.client.get(reverse(INDEX)), TEST_POST)
+        self.sync()
+        self.assertContains(self.client.get(reverse(INDEX)), TEST_POST)
+
+    def test_writer_sticks_to_primary(self):
+        """После записи автор читает с primary, остальные — с реплики."""
+        self.sync()
+        author = Client()
+        author.force_login(self.user)
+        response = author.post(reverse(POST_CREATE), {TEXT: NEW_TEXT_POST})
+        self.assertIn(STICKY_COOKIE, response.cookies)
+
+        profile = reverse(PROFILE, args=[AUTH])
+        self.assertContains(author.get(profile), NEW_TEXT_POST)
+        self.assertNotContains(self.client.get(profile), NEW_TEXT_POST)
+        self.sync()
+        self.assertContains(self.client.get(profile), NEW_TEXT_POST)
@@ -0,0 +1,82 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post, User
+from posts.search import search_posts
+from posts.tests.test_constant import (
+    AUTH, TEST_NAME, TEST_SLUG, TEST_DISCRIP, PAGE_OBJ
+)
+
+SEARCH = 'posts:search'
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Поиск работает на SQLite FTS5')
+class PostsSearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTH)
+        cls.group = Group.objects.create(
+            title=TEST_NAME,
+            slug=TEST_SLUG,
+            description=TEST_DISCRIP,
+        )
+        cls.post = Post.objects.create(
+            text='Сегодня видели жирафа в зоопарке',
+            author=cls.user,
+            group=cls.group,
+        )
+        Post.objects.create(text='Жираф и ещё раз жираф', author=cls.user)
+        Post.objects.create(text='Про погоду', author=cls.user)
+
+    def test_search_view_ranks_results(self):
+        """Поиск находит посты, самый релевантный — первым."""
+        response = self.client.get(reverse(SEARCH), {'q': 'жираф'})
+        posts = list(response.context[PAGE_OBJ])
+        self.assertEqual(len(posts), 1)
+
+        response = self.client.get(reverse(SEARCH), {'q': 'ЖИРАФ раз'})
+        self.assertEqual(response.context[PAGE_OBJ][0].text,
+                         'Жираф и ещё раз жираф')
+
+    def test_search_follows_edit_and_delete(self):
+        """Индекс обновляется при правке и удалении постов."""
+        self.post.text = 'Сегодня видели слона'
+        self.post.save()
+        self.assertEqual(len(search_posts('жирафа')), 0)
+        self.assertEqual(list(search_posts('слона')), [self.post])
+        self.post.delete()
+        self.assertEqual(len(search_posts('слона')), 0)
+
+    def test_search_filters_and_cursor(self):
+        """Фильтр по группе и курсорная пагинация результатов."""
+        page = search_posts('жираф жирафа', group=self.group)
+        self.assertEqual(list(page), [])
+        page = search_posts('сегодня', group=self.group)
+        self.assertEqual(list(page), [self.post])
+
+        Post.objects.bulk_create(
+            Post(text=f'Кот номер {count}', author=self.user)
+            for count in range(5)
+        )
+        first = search_posts('кот', per_page=3)
+        second = search_posts('кот', cursor=first.next_cursor, per_page=3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse(second.has_next())
+        self.assertTrue(set(first).isdisjoint(set(second)))
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке ищет по тому же индексу."""
+        admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'погоду'}
+        )
+        self.assertEqual(response.context['cl'].result_count, 1)
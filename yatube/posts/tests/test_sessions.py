@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.functional import empty
+
+from posts.tests.test_constant import AUTH, INDEX, PROFILE, USER_NAME
+
+User = get_user_model()
+
+SIGNED_COOKIES = 'django.contrib.sessions.backends.signed_cookies'
+
+
+class AnonymousReadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=AUTH)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_public_page_without_session(self):
+        """Аноним на публичной странице: ни сессии, ни поиска пользователя."""
+        for url in (reverse(INDEX), reverse('about:author')):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                request = response.wsgi_request
+                self.assertTrue(request.anonymous_read)
+                self.assertIs(request.session._wrapped, empty)
+                self.assertFalse(request.user.is_authenticated)
+                self.assertIn('Cookie', response['Vary'])
+                self.assertNotIn('sessionid', response.cookies)
+
+    def test_other_requests_use_session(self):
+        """Вход, POST и клиент с cookie сессии идут обычным путём."""
+        self.assertFalse(
+            self.client.get(reverse('users:login')).wsgi_request
+            .anonymous_read
+        )
+        self.assertFalse(
+            self.client.post(reverse(INDEX)).wsgi_request.anonymous_read
+        )
+        self.client.force_login(self.user)
+        request = self.client.get(reverse(INDEX)).wsgi_request
+        self.assertFalse(request.anonymous_read)
+        self.assertEqual(request.user, self.user)
+
+
+@override_settings(SESSION_ENGINE=SIGNED_COOKIES)
+class SignedCookieSessionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username=AUTH)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_authenticated_read_without_session_query(self):
+        """Вошедший пользователь читает страницы без запросов к сессиям."""
+        url = reverse(PROFILE, kwargs={USER_NAME: AUTH})
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.wsgi_request.user, self.user)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if 'django_session' in query['sql']
+        ])
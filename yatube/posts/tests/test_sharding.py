@@ -0,0 +1,223 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.bulk import insert_posts
+from posts.models import AuthorCounter, AuthorShard, Group, Post, User
+from posts.search import search_posts
+from posts.sharding import (
+    assign_shard, cancel_move, shard_for_author, start_move
+)
+from posts.views import MOVING_ERROR
+from posts.tests.test_constant import (
+    AUTH, DETAIL, EDIT, EDIT_TEXT_POST, GROUP_LIST, INDEX, NEW_USER, PROFILE,
+    TEST_NAME, TEST_SLUG, TEST_DISCRIP, TEST_POST, TEXT, GROUP,
+    POST_CREATE, TEST_OF_POST, CURSOR
+)
+
+SHARDS = ['shard_0', 'shard_1']
+
+
+@override_settings(POST_SHARDS=SHARDS)
+class ShardingTests(TransactionTestCase):
+    databases = {'default', *SHARDS}
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(
+            title=TEST_NAME, slug=TEST_SLUG, description=TEST_DISCRIP
+        )
+        self.authors = [
+            User.objects.create_user(username=AUTH),
+            User.objects.create_user(username=NEW_USER),
+        ]
+        for author, shard in zip(self.authors, SHARDS):
+            assign_shard(author.pk, shard)
+        self.posts = [
+            Post.objects.create(
+                text=f'{TEST_POST} {number}',
+                author=self.authors[number % 2],
+                group=self.group,
+            )
+            for number in range(TEST_OF_POST)
+        ]
+
+    def test_posts_live_in_author_shard(self):
+        """Посты лежат в шарде автора, id не пересекаются."""
+        for author, shard in zip(self.authors, SHARDS):
+            with self.subTest(shard=shard):
+                self.assertEqual(
+                    set(Post.objects.using(shard).values_list(
+                        'author_id', flat=True
+                    )),
+                    {author.pk},
+                )
+        self.assertFalse(Post.objects.using('default').exists())
+        ids = [post.pk for post in self.posts]
+        self.assertEqual(len(set(ids)), len(ids))
+
+    def test_feeds_merge_shards(self):
+        """Главная и группа сливают шарды по дате, курсор проходит всё."""
+        expected = [post.text for post in reversed(self.posts)]
+        client = Client()
+        client.force_login(self.authors[0])
+        for url in (reverse(INDEX), reverse(GROUP_LIST, args=[TEST_SLUG])):
+            with self.subTest(url=url):
+                texts = []
+                cursor = {}
+                while cursor is not None:
+                    page_obj = client.get(url, cursor).context['page_obj']
+                    texts.extend(post.text for post in page_obj)
+                    cursor = page_obj.next_cursor and {
+                        CURSOR: page_obj.next_cursor
+                    }
+                self.assertEqual(texts, expected)
+
+    def test_api_feeds_and_exports_merge_shards(self):
+        """API, RSS и выгрузка читают все шарды, а не пустой default."""
+        expected = [post.text for post in reversed(self.posts)]
+        results = self.client.get(
+            reverse('posts:api_index'), {'limit': 100}
+        ).json()['results']
+        self.assertEqual([row['text'] for row in results], expected)
+        self.assertEqual(
+            {row['author'] for row in results}, {AUTH, NEW_USER}
+        )
+        self.assertEqual({row['group'] for row in results}, {TEST_SLUG})
+        post = self.posts[1]
+        self.assertEqual(
+            self.client.get(
+                reverse('posts:api_post_detail', args=[post.pk])
+            ).json()['author'],
+            NEW_USER,
+        )
+        self.assertContains(
+            self.client.get(reverse('posts:feed_rss')), expected[0]
+        )
+        self.assertContains(
+            self.client.get(reverse('posts:profile_feed_rss', args=[AUTH])),
+            self.posts[-1].text,
+        )
+        lines = b''.join(self.client.get(
+            reverse('posts:export', args=['jsonl'])
+        ).streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), TEST_OF_POST)
+
+    def test_search_merges_shards(self):
+        """Поиск опрашивает индекс каждого шарда."""
+        self.assertEqual(
+            len(search_posts(TEST_POST, per_page=100)), TEST_OF_POST
+        )
+        self.assertEqual(
+            {post.author for post in search_posts(
+                TEST_POST, author=self.authors[1], per_page=100
+            )},
+            {self.authors[1]},
+        )
+
+    def test_default_only_tools_refuse(self):
+        """Админка постов и импорт с шардами отказывают явно."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(reverse('admin:posts_post_changelist'))
+        self.assertRedirects(response, reverse('admin:index'))
+        with self.assertRaises(CommandError):
+            call_command('import_posts', '-', stdout=StringIO())
+
+    def test_profile_reads_one_shard(self):
+        """Профиль читает только шард автора."""
+        with CaptureQueriesContext(connections['shard_1']) as other:
+            response = self.client.get(reverse(PROFILE, args=[AUTH]))
+        self.assertEqual(len(other.captured_queries), 0)
+        self.assertEqual(
+            len(response.context['page_obj']),
+            len(self.posts[::2][:10]),
+        )
+
+    def test_create_edit_and_detail(self):
+        """Новый пост и правка попадают в шард автора."""
+        client = Client()
+        client.force_login(self.authors[1])
+        client.post(reverse(POST_CREATE), {TEXT: TEST_POST})
+        post = Post.objects.using('shard_1').latest('id')
+        client.post(
+            reverse(EDIT, args=[post.pk]),
+            {TEXT: EDIT_TEXT_POST, GROUP: self.group.pk},
+        )
+        post = Post.objects.locate(post.pk)
+        self.assertEqual(post._state.db, 'shard_1')
+        self.assertEqual(post.text, EDIT_TEXT_POST)
+        self.assertContains(
+            self.client.get(reverse(DETAIL, args=[post.pk])), EDIT_TEXT_POST
+        )
+
+    def test_move_author(self):
+        """move_author переносит посты, счётчики остаются прежними."""
+        author = self.authors[0]
+        count = AuthorCounter.objects.get(author=author).posts_count
+        call_command('move_author', AUTH, 'shard_1', stdout=StringIO())
+        self.assertEqual(shard_for_author(author.pk), 'shard_1')
+        self.assertFalse(Post.objects.using('shard_0').exists())
+        self.assertEqual(
+            Post.objects.for_author(author.pk).filter(author=author).count(),
+            count,
+        )
+        self.assertEqual(
+            AuthorCounter.objects.get(author=author).posts_count, count
+        )
+        self.assertContains(
+            self.client.get(reverse(PROFILE, args=[AUTH])), TEST_POST
+        )
+
+    def test_directory_is_read_from_db(self):
+        """Смену шарда из другого процесса видно сразу, без кэша."""
+        author = self.authors[0]
+        AuthorShard.objects.filter(author=author).update(alias='shard_1')
+        self.assertEqual(shard_for_author(author.pk), 'shard_1')
+
+    def test_writes_refused_while_moving(self):
+        """Пока посты переезжают, автор не может их писать."""
+        author = self.authors[1]
+        start_move(author.pk, 'shard_0')
+        client = Client()
+        client.force_login(author)
+        count = Post.objects.using('shard_1').count()
+        response = client.post(reverse(POST_CREATE), {TEXT: TEST_POST})
+        self.assertContains(response, MOVING_ERROR)
+        self.assertEqual(Post.objects.using('shard_1').count(), count)
+        cancel_move(author.pk)
+        client.post(reverse(POST_CREATE), {TEXT: TEST_POST})
+        self.assertEqual(Post.objects.using('shard_1').count(), count + 1)
+
+    def test_move_deletes_only_copied(self):
+        """Пост, появившийся в старом шарде после копирования, остаётся."""
+        author = self.authors[0]
+        real_assign = assign_shard
+
+        def late_write(author_id, alias):
+            insert_posts(
+                [(TEST_POST, timezone.now(), author_id, None)],
+                using='shard_0',
+            )
+            real_assign(author_id, alias)
+
+        stderr = StringIO()
+        with mock.patch(
+            'posts.management.commands.move_author.assign_shard', late_write
+        ):
+            call_command(
+                'move_author', AUTH, 'shard_1',
+                stdout=StringIO(), stderr=stderr,
+            )
+        self.assertEqual(
+            Post.objects.using('shard_0').filter(author=author).count(), 1
+        )
+        self.assertIn('остались', stderr.getvalue())
@@ -0,0 +1,71 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.staticfiles import finders
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import TestCase, override_settings
+
+from core.middleware import IMMUTABLE_CACHE_CONTROL, accepted_encodings
+
+STATIC_ROOT = tempfile.mkdtemp()
+CSS = 'css/bootstrap.min.css'
+
+
+@override_settings(
+    STATIC_ROOT=STATIC_ROOT,
+    STATICFILES_STORAGE='core.staticfiles.BuiltStaticFilesStorage',
+)
+class StaticBuildTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        call_command('build_static', stdout=StringIO())
+        with open(os.path.join(STATIC_ROOT, 'staticfiles.json')) as source:
+            cls.manifest = json.load(source)['paths']
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(STATIC_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_only_referenced_assets_collected(self):
+        """Собирается только статика из шаблонов, с хэшем в имени."""
+        self.assertIn(CSS, self.manifest)
+        self.assertIn('img/fav/favicon.ico', self.manifest)
+        self.assertNotIn('css/bootstrap.css', self.manifest)
+        self.assertNotIn('js/bootstrap.js', self.manifest)
+        self.assertNotEqual(self.manifest[CSS], CSS)
+        self.assertEqual(static(CSS), '/static/' + self.manifest[CSS])
+
+    def test_precompressed_variant_served(self):
+        """По Accept-Encoding отдаётся .gz-копия с вечным кэшированием."""
+        with open(finders.find(CSS), 'rb') as source:
+            original = source.read()
+        url = static(CSS)
+        cases = {'gzip, deflate': 'gzip', 'identity': None, 'gzip;q=0': None}
+        for header, encoding in cases.items():
+            with self.subTest(header=header):
+                response = self.client.get(
+                    url, HTTP_ACCEPT_ENCODING=header
+                )
+                body = b''.join(response.streaming_content)
+                response.close()
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+                self.assertEqual(
+                    response['Cache-Control'], IMMUTABLE_CACHE_CONTROL
+                )
+                self.assertEqual(response['Content-Type'], 'text/css')
+                self.assertEqual(
+                    gzip.decompress(body) if encoding else body, original
+                )
+
+    def test_accepted_encodings(self):
+        """Кодировки с q=0 клиент не принимает."""
+        self.assertEqual(
+            accepted_encodings('br;q=0.8, GZIP, deflate;q=0'), {'br', 'gzip'}
+        )
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+from django.test import SimpleTestCase
+
+from core.template_cache import (
+    CACHED_LOADERS, preload_templates, template_names
+)
+
+
+class TemplatePreloadTests(SimpleTestCase):
+    def setUp(self):
+        self.engine = DjangoTemplates({
+            'NAME': 'preload',
+            'DIRS': [settings.TEMPLATES_DIR],
+            'APP_DIRS': False,
+            'OPTIONS': {'debug': False, 'loaders': CACHED_LOADERS},
+        })
+        self.loader = self.engine.engine.template_loaders[0]
+
+    def test_all_project_templates_compiled(self):
+        """Предзагрузка компилирует каждый шаблон из templates/."""
+        loaded = preload_templates(self.engine)
+        names = set(template_names([settings.TEMPLATES_DIR]))
+        self.assertIn('includes/post_art.html', names)
+        self.assertLessEqual(names, loaded)
+        self.assertLessEqual(names, set(self.loader.get_template_cache))
+
+    def test_included_templates_served_from_cache(self):
+        """После предзагрузки include не обращается к загрузчикам файлов."""
+        preload_templates(self.engine)
+        cached = dict(self.loader.get_template_cache)
+        self.loader.loaders = []
+        for name in ('posts/index.html', 'includes/post_art.html',
+                     'posts/includes/paginator.html'):
+            with self.subTest(name=name):
+                self.assertIs(
+                    self.engine.get_template(name).template, cached[name]
+                )
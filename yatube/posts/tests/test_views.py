@@ -1,14 +1,25 @@
+from http import HTTPStatus
+
 from django import forms
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
+from posts.bulk import insert_posts
+from posts.cache import index_feed, touch_feeds
+from posts.counters import FeedCount
 from posts.models import Group, Post, User
+from posts.utils import POST_LIMIT, feed_posts, page_window
 from posts.tests.test_constant import (
     INDEX, POST_CREATE, GROUP_LIST, PROFILE, TEST_POST, POST_ID,
     EDIT, AUTH, TEST_NAME, TEST_SLUG, TEST_DISCRIP, PAGE, POST,
     INDEX, POST_CREATE, GROUP_LIST, DETAIL, TEST_OF_POST, FORM,
     INDEX_HTML, CREATE_HTML, GROUP_LIST_HTML, SLUG, USER_NAME,
-    PAGE_OBJ, AUTHOR, TEXT, GROUP
+    PAGE_OBJ, AUTHOR, TEXT, GROUP, CURSOR, NEW_TEXT_POST, TEST_NAME_GROUP,
+    EDIT_TEXT_POST
 )
 
 
@@ -171,6 +182,20 @@ class PostsViewsTests(TestCase):
         group = post.group
         self.assertEqual(group, self.group)
 
+    def test_post_card_cache_invalidation(self):
+        """Правка поста и переименование группы обновляют карточку."""
+        self.authorized_client.get(reverse(INDEX))
+        self.authorized_client.post(
+            reverse(EDIT, kwargs={POST_ID: self.post.id}),
+            data={TEXT: NEW_TEXT_POST, GROUP: self.group.id},
+        )
+        Group.objects.filter(pk=self.group.pk).update(title=TEST_NAME_GROUP)
+
+        response = self.authorized_client.get(reverse(INDEX))
+        self.assertContains(response, NEW_TEXT_POST)
+        self.assertContains(response, TEST_NAME_GROUP)
+        self.assertNotContains(response, TEST_POST)
+
 
 class PostsPaginatorViewsTests(TestCase):
     @classmethod
@@ -191,6 +216,9 @@ class PostsPaginatorViewsTests(TestCase):
                                   author=cls.user))
         Post.objects.bulk_create(bilk_post)
 
+    def setUp(self):
+        cache.clear()
+
     def test_paginator_on_pages(self):
         """Проверка пагинации на страницах."""
 
@@ -212,3 +240,311 @@ class PostsPaginatorViewsTests(TestCase):
                 self.assertEqual(
                     len(response.context[PAGE_OBJ]), count,
                 )
+
+    def test_page_window_size_is_constant(self):
+        """Число ссылок пагинатора не растёт с числом страниц."""
+        MAX_LINKS = 9
+        paginator = Paginator(range(10 ** 6), 10)
+        for number in (1, 2, 500, 50000, 99999, 100000):
+            with self.subTest(number=number):
+                window = page_window(paginator.page(number))
+                self.assertLessEqual(len(window), MAX_LINKS)
+                self.assertEqual(window[0].number, 1)
+                self.assertEqual(window[-1].number, paginator.num_pages)
+                current = [link for link in window if link.is_current]
+                self.assertEqual(current[0].number, number)
+
+    def test_cursor_paginator_on_pages(self):
+        """Проверка курсорной пагинации вперёд и назад."""
+
+        url_pages = [
+            reverse(INDEX),
+            reverse(GROUP_LIST, kwargs={SLUG: self.group.slug}),
+            reverse(PROFILE, kwargs={USER_NAME: self.user.username}),
+        ]
+        for url in url_pages:
+            with self.subTest(url=url):
+                first = self.client.get(url, {CURSOR: ''}).context[PAGE_OBJ]
+                self.assertEqual(len(first), 10)
+                self.assertFalse(first.has_previous())
+
+                second = self.client.get(
+                    url, {CURSOR: first.next_cursor}
+                ).context[PAGE_OBJ]
+                self.assertEqual(len(second), 3)
+                self.assertFalse(second.has_next())
+                self.assertTrue(
+                    set(first).isdisjoint(set(second))
+                )
+
+                back = self.client.get(
+                    url, {CURSOR: second.previous_cursor}
+                ).context[PAGE_OBJ]
+                self.assertEqual(list(back), list(first))
+
+
+class PostsQueryCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        posts = []
+        for count in range(TEST_OF_POST):
+            author = User.objects.create_user(username=f'{AUTH} {count}')
+            group = Group.objects.create(
+                title=f'{TEST_NAME} {count}',
+                slug=f'{TEST_SLUG}-{count}',
+                description=TEST_DISCRIP,
+            )
+            posts.append(Post(text=TEST_POST, author=author, group=group))
+        Post.objects.bulk_create(posts)
+        cls.user = User.objects.get(username=f'{AUTH} 0')
+        cls.group = Group.objects.get(slug=f'{TEST_SLUG}-0')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_feed_pages_query_count(self):
+        """Число запросов ленты не зависит от числа постов на странице."""
+        url_queries = (
+            (reverse(INDEX), 3),
+            (reverse(GROUP_LIST, kwargs={SLUG: self.group.slug}), 4),
+            (reverse(PROFILE, kwargs={USER_NAME: self.user.username}), 4),
+        )
+        for url, queries in url_queries:
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+
+class PostsPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTH)
+        cls.group = Group.objects.create(
+            title=TEST_NAME,
+            slug=TEST_SLUG,
+            description=TEST_DISCRIP,
+        )
+        cls.post = Post.objects.create(
+            text=TEST_POST,
+            author=cls.user,
+            group=cls.group,
+        )
+        cls.url_pages = [
+            reverse(INDEX),
+            reverse(GROUP_LIST, kwargs={SLUG: cls.group.slug}),
+            reverse(PROFILE, kwargs={USER_NAME: cls.user.username}),
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_anonymous_feed_is_cached(self):
+        """Повторный анонимный запрос ленты читает из базы только версии."""
+        for url in self.url_pages:
+            with self.subTest(url=url):
+                # Первый запрос узнаёт состав страницы, второй кладёт её
+                # в кэш под версиями её постов.
+                self.client.get(url)
+                self.client.get(url)
+                with self.assertNumQueries(1):
+                    response = self.client.get(url)
+                self.assertContains(response, TEST_POST)
+
+    def test_edit_purges_only_pages_with_post(self):
+        """Правка поста сбрасывает только страницы, где он показан."""
+        for _ in range(POST_LIMIT):
+            Post.objects.create(text=NEW_TEXT_POST, author=self.user)
+        first, second = reverse(INDEX), reverse(INDEX) + '?page=2'
+        for url in (first, second, first, second):
+            self.client.get(url)
+        self.authorized_client.post(
+            reverse(EDIT, kwargs={POST_ID: self.post.id}),
+            data={TEXT: EDIT_TEXT_POST, GROUP: self.group.id},
+        )
+        with self.assertNumQueries(1):
+            self.client.get(first)
+        self.assertContains(self.client.get(second), EDIT_TEXT_POST)
+
+    def test_new_and_edited_post_purge_feeds(self):
+        """Новый и отредактированный посты сразу видны анонимам."""
+        for url in self.url_pages:
+            self.client.get(url)
+        self.authorized_client.post(
+            reverse(POST_CREATE),
+            data={TEXT: NEW_TEXT_POST, GROUP: self.group.id},
+        )
+        for url in self.url_pages:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), NEW_TEXT_POST)
+
+        self.authorized_client.post(
+            reverse(EDIT, kwargs={POST_ID: self.post.id}),
+            data={TEXT: EDIT_TEXT_POST, GROUP: self.group.id},
+        )
+        for url in self.url_pages:
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), EDIT_TEXT_POST)
+
+
+class PostsConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTH)
+        cls.group = Group.objects.create(
+            title=TEST_NAME,
+            slug=TEST_SLUG,
+            description=TEST_DISCRIP,
+        )
+        cls.post = Post.objects.create(
+            text=TEST_POST,
+            author=cls.user,
+            group=cls.group,
+        )
+        # Сколько запросов нужно, чтобы ответить 304.
+        cls.url_pages = {
+            reverse(INDEX): 1,
+            reverse(GROUP_LIST, kwargs={SLUG: cls.group.slug}): 1,
+            reverse(PROFILE, kwargs={USER_NAME: cls.user.username}): 1,
+            reverse(DETAIL, kwargs={POST_ID: cls.post.id}): 1,
+        }
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def warm_get(self, url, client=None):
+        """Второй запрос: первый после изменения ленты узнаёт её состав."""
+        client = client or self.client
+        client.get(url)
+        return client.get(url)
+
+    def test_first_request_after_change_has_no_etag(self):
+        """Пока состав страницы ленты неизвестен, ETag не отдаётся."""
+        url = reverse(INDEX)
+        self.assertFalse(self.client.get(url).has_header('ETag'))
+        self.assertTrue(self.client.get(url).has_header('ETag'))
+
+    def test_matching_etag_gets_not_modified(self):
+        """Совпавший ETag и Last-Modified дают 304 без выборки постов."""
+        for url, queries in self.url_pages.items():
+            with self.subTest(url=url):
+                response = self.warm_get(url)
+                self.assertTrue(response.has_header('ETag'))
+                self.assertTrue(response.has_header('Last-Modified'))
+                with self.assertNumQueries(queries):
+                    response = self.client.get(
+                        url, HTTP_IF_NONE_MATCH=response['ETag']
+                    )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+                response = self.client.get(url)
+                response = self.client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_write_from_other_process_changes_etag(self):
+        """Запись из другого процесса видна по версии ленты в базе."""
+        url = reverse(INDEX)
+        etag = self.warm_get(url)['ETag']
+        # Другой процесс (воркер, импорт) пишет в базу, но не в наш кэш.
+        insert_posts([(NEW_TEXT_POST, timezone.now(), self.user.pk, None)])
+        touch_feeds(index_feed())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, NEW_TEXT_POST)
+
+    def test_edited_post_changes_etag(self):
+        """После правки поста старый ETag больше не совпадает."""
+        etags = {url: self.warm_get(url)['ETag'] for url in self.url_pages}
+        self.authorized_client.post(
+            reverse(EDIT, kwargs={POST_ID: self.post.id}),
+            data={TEXT: EDIT_TEXT_POST, GROUP: self.group.id},
+        )
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertContains(response, EDIT_TEXT_POST)
+
+    def test_etag_depends_on_user(self):
+        """Анониму и автору страница отдаётся с разными ETag."""
+        for url in self.url_pages:
+            with self.subTest(url=url):
+                etag = self.warm_get(url)['ETag']
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertNotEqual(response['ETag'], etag)
+
+
+class PostsFeedCountTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=AUTH)
+        cls.post = Post.objects.create(text=TEST_POST, author=cls.user)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def get_count(self):
+        response = self.authorized_client.get(reverse(INDEX))
+        return response.context[PAGE_OBJ].paginator.count
+
+    def test_feed_count_is_cached_and_updated(self):
+        """Число постов ленты берётся из кэша до новой версии ленты."""
+        self.get_count()
+        Post.objects.create(text=TEST_POST, author=self.user)
+        self.assertEqual(self.get_count(), 2)
+        with self.assertNumQueries(4):
+            self.assertEqual(self.get_count(), 2)
+
+    def test_feed_count_follows_other_process(self):
+        """Пост из другого процесса сдвигает закэшированное число."""
+        self.get_count()
+        self.assertEqual(self.get_count(), 1)
+        # Другой процесс пишет в базу и в FeedVersion, но не в наш кэш.
+        insert_posts([(NEW_TEXT_POST, timezone.now(), self.user.pk, None)])
+        touch_feeds(index_feed())
+        self.assertEqual(self.get_count(), 2)
+
+    def test_feed_count_estimate(self):
+        """Для больших лент пагинатор берёт оценку по диапазону id."""
+        Post.objects.create(text=TEST_POST, author=self.user).delete()
+        Post.objects.create(text=TEST_POST, author=self.user)
+        cache.clear()
+        with override_settings(FEED_COUNT_ESTIMATE_ABOVE=0):
+            self.assertEqual(FeedCount(feed_posts())(), 3)
+        cache.clear()
+        self.assertEqual(FeedCount(feed_posts())(), 2)
+
+    @override_settings(FEED_COUNT_ESTIMATE_ABOVE=0)
+    def test_feed_count_estimate_per_key(self):
+        """Популярная группа и автор не занижаются средним по индексу."""
+        hot = Group.objects.create(title=TEST_NAME, slug='hot', description='')
+        cold = Group.objects.create(title=TEST_NAME, slug='cold',
+                                    description='')
+        for _ in range(5):
+            Post.objects.create(text=TEST_POST, author=self.user, group=hot)
+        Post.objects.create(text=TEST_POST, author=self.user, group=cold)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        cache.clear()
+        for group, count in ((hot, 5), (cold, 1)):
+            with self.subTest(group=group.slug):
+                self.assertEqual(FeedCount(
+                    Post.objects.filter(group=group), group_id=group.pk
+                )(), count)
+        self.assertEqual(FeedCount(
+            Post.objects.filter(author=self.user), author_id=self.user.pk
+        )(), 7)
@@ -0,0 +1,59 @@
+import json
+
+from sorl.thumbnail import get_thumbnail
+
+from tasks.queue import task
+
+# Ширины миниатюр для srcset: карточка в ленте, на странице поста
+# и для экранов с высокой плотностью точек.
+THUMBNAIL_WIDTHS = (320, 640, 960)
+# Маленькую картинку не растягиваем: srcset обойдётся меньшим набором.
+THUMBNAIL_OPTIONS = {'upscale': False, 'quality': 85}
+
+
+def thumbnails(image):
+    """Миниатюры картинки по THUMBNAIL_WIDTHS, без повторов по ширине.
+
+    Если миниатюра уже сделана, sorl берёт её из своего хранилища
+    ключей, не открывая картинку.
+    """
+    made = {}
+    for width in THUMBNAIL_WIDTHS:
+        thumbnail = get_thumbnail(image, str(width), **THUMBNAIL_OPTIONS)
+        made.setdefault(thumbnail.width, thumbnail)
+    return list(made.values())
+
+
+@task(priority=5)
+def make_thumbnails(post_id, image_name, using):
+    """Делает миниатюры поста и записывает их в post.thumbnails.
+
+    Карточка потом берёт адреса и размеры из поста и не ходит в sorl.
+    Если картинку успели заменить, ничего не делает: для новой
+    картинки уже поставлена своя задача.
+    """
+    from .models import Post
+
+    post = Post.objects.using(using).filter(pk=post_id).first()
+    if post is None or post.image.name != image_name:
+        return
+    post.thumbnails = json.dumps([
+        {
+            'url': thumbnail.url,
+            'width': thumbnail.width,
+            'height': thumbnail.height,
+        }
+        for thumbnail in thumbnails(post.image)
+    ])
+    # post_save отметит пост изменённым: страницы с ним обновятся во
+    # всех процессах.
+    post.save(update_fields=['thumbnails', 'updated'])
+
+
+def schedule_thumbnails(post, using):
+    """Ставит миниатюры поста в очередь задач (воркер run_tasks).
+
+    Задача пишется в ту же транзакцию, что и пост, если он в базе
+    default; откат поста отменит и её.
+    """
+    make_thumbnails.enqueue(post.pk, post.image.name, using)
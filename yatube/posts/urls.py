@@ -1,6 +1,6 @@
 from django.urls import path
 
-from . import views
+from . import api, feeds, views
 
 app_name = 'posts'
 
@@ -11,4 +11,50 @@ urlpatterns = [
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path('search/', views.search, name='search'),
+    path('export/<str:export_format>/', views.export, name='export'),
+    path(
+        'group/<slug:slug>/export/<str:export_format>/',
+        views.group_export,
+        name='group_export',
+    ),
+    path(
+        'profile/<str:username>/export/<str:export_format>/',
+        views.profile_export,
+        name='profile_export',
+    ),
+    path('api/posts/', api.index, name='api_index'),
+    path('api/posts/<int:post_id>/', api.post_detail, name='api_post_detail'),
+    path('api/group/<slug:slug>/', api.group_posts, name='api_group_list'),
+    path('api/profile/<str:username>/', api.profile, name='api_profile'),
+    path(
+        'feed/rss/',
+        feeds.conditional(feeds.LatestPostsFeed()),
+        name='feed_rss',
+    ),
+    path(
+        'feed/atom/',
+        feeds.conditional(feeds.LatestPostsAtomFeed()),
+        name='feed_atom',
+    ),
+    path(
+        'group/<slug:slug>/feed/rss/',
+        feeds.conditional(feeds.GroupPostsFeed()),
+        name='group_feed_rss',
+    ),
+    path(
+        'group/<slug:slug>/feed/atom/',
+        feeds.conditional(feeds.GroupPostsAtomFeed()),
+        name='group_feed_atom',
+    ),
+    path(
+        'profile/<str:username>/feed/rss/',
+        feeds.conditional(feeds.AuthorPostsFeed()),
+        name='profile_feed_rss',
+    ),
+    path(
+        'profile/<str:username>/feed/atom/',
+        feeds.conditional(feeds.AuthorPostsAtomFeed()),
+        name='profile_feed_atom',
+    ),
 ]
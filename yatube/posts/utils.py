@@ -1,12 +1,328 @@
+import base64
+import heapq
+import json
+from collections import namedtuple
+from operator import attrgetter, itemgetter
+
 from django.core.paginator import Paginator
+from django.db.models import Q, prefetch_related_objects
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from .models import Group, Post, User
+from .sharding import sharding_enabled
 
 
 POST_LIMIT = 10
 
+CURSOR_PARAM = 'cursor'
+CURSOR_ORDERING = ('-pub_date', 'id')
+NEXT = 'n'
+PREVIOUS = 'p'
+
+# Сколько ссылок показывать вокруг текущей страницы и у краёв.
+PAGE_WINDOW = 2
+PAGE_WINDOW_ENDS = 1
+
+PageLink = namedtuple('PageLink', ('number', 'is_current', 'is_jump'))
+
+# Поля, которые читает карточка поста includes/post_art.html.
+FEED_FIELDS = (
+    'text',
+    'pub_date',
+    'updated',
+    'image',
+    'thumbnails',
+    'author__username',
+    'author__first_name',
+    'author__last_name',
+    'group__slug',
+    'group__title',
+)
+
+# То же для шарда: автор и группа живут на default, JOIN невозможен,
+# их подтягивает prefetch_feed() уже для готовой страницы.
+SHARD_FEED_FIELDS = (
+    'text', 'pub_date', 'updated', 'image', 'thumbnails', 'author',
+    'group',
+)
+
+
+def feed_posts(**filters):
+    """Queryset ленты: автор и группа подтягиваются одним JOIN."""
+    return (
+        Post.objects.filter(**filters)
+        .select_related('author', 'group')
+        .only(*FEED_FIELDS)
+    )
+
+
+def feed_querysets(**filters):
+    """Querysets ленты по шардам; без шардирования — один feed_posts()."""
+    if not sharding_enabled():
+        return [feed_posts(**filters)]
+    return [
+        queryset.only(*SHARD_FEED_FIELDS)
+        for queryset in Post.objects.on_shards(**filters)
+    ]
+
+
+def prefetch_feed(posts):
+    """Авторы и группы постов из шардов: по запросу на модель."""
+    if sharding_enabled():
+        prefetch_related_objects(posts, 'author', 'group')
+
+
+# Колонки values(), которые на default читаются через JOIN. В шарде
+# вместо них берётся id связанной записи, а имя подставляет
+# fill_related().
+RELATED_COLUMNS = {
+    'author__username': ('author_id', User, 'username'),
+    'group__slug': ('group_id', Group, 'slug'),
+}
+
+
+def values_querysets(columns, **filters):
+    """Querysets values(*columns) по шардам; без шардов — один."""
+    if not sharding_enabled():
+        return [Post.objects.filter(**filters).values(*columns)]
+    columns = [
+        RELATED_COLUMNS.get(column, (column,))[0] for column in columns
+    ]
+    return [
+        queryset.values(*columns)
+        for queryset in Post.objects.on_shards(**filters)
+    ]
+
+
+def fill_related(rows, columns):
+    """Имена авторов и slug групп для строк из values_querysets().
+
+    По запросу на связанную модель для всех строк сразу; без шардов
+    строки уже готовы.
+    """
+    if not sharding_enabled():
+        return rows
+    for column in columns:
+        if column not in RELATED_COLUMNS:
+            continue
+        key, model, field = RELATED_COLUMNS[column]
+        ids = {row[key] for row in rows} - {None}
+        names = dict(
+            model.objects.filter(pk__in=ids).values_list('pk', field)
+        ) if ids else {}
+        for row in rows:
+            row[column] = names.get(row.pop(key))
+    return rows
+
+
+# Позиция записи в ленте: у моделей — атрибуты, у строк values() — ключи.
+POST_POSITION = attrgetter('pub_date', 'pk')
+ROW_POSITION = itemgetter('pub_date', 'id')
+
+
+def encode_cursor(position, direction):
+    """Упаковывает позицию (pub_date, id) в ленте в непрозрачный токен."""
+    pub_date, pk = position
+    raw = json.dumps([direction, pub_date.isoformat(), pk])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Распаковывает токен курсора; для битого токена возвращает None."""
+    if not token:
+        return None
+    try:
+        padding = '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(token + padding).decode()
+        direction, pub_date, pk = json.loads(raw)
+        pub_date = parse_datetime(pub_date)
+    except (ValueError, TypeError):
+        return None
+    if direction not in (NEXT, PREVIOUS) or pub_date is None:
+        return None
+    if not isinstance(pk, int):
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPage:
+    """Страница ленты, выбранная по ключу (pub_date, id) без OFFSET."""
+
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def merge_rows(querysets, position, backwards, limit):
+    """k-way слияние уже упорядоченных по ключу ленты querysets.
+
+    Каждый queryset даёт не больше limit строк; дубликаты (пост,
+    который переносят между шардами) пропускаются.
+    """
+    if len(querysets) == 1:
+        return list(querysets[0][:limit])
+
+    def key(row):
+        pub_date, pk = position(row)
+        if backwards:
+            return pub_date.timestamp(), -pk
+        return -pub_date.timestamp(), pk
+
+    rows = []
+    previous = None
+    for row in heapq.merge(
+        *(queryset[:limit] for queryset in querysets), key=key
+    ):
+        if position(row) == previous:
+            continue
+        previous = position(row)
+        rows.append(row)
+        if len(rows) == limit:
+            break
+    return rows
+
+
+def latest_posts(limit, **filters):
+    """Первые limit постов ленты; шарды сливаются по дате."""
+    posts = merge_rows(
+        [
+            queryset.order_by(*CURSOR_ORDERING)
+            for queryset in feed_querysets(**filters)
+        ],
+        POST_POSITION,
+        backwards=False,
+        limit=limit,
+    )
+    prefetch_feed(posts)
+    return posts
+
+
+def cursor_paginat(request, data_list, per_page=POST_LIMIT,
+                   position=POST_POSITION):
+    """Keyset-пагинация: стоимость страницы не зависит от её глубины.
+
+    data_list может быть и queryset'ом values(): тогда position
+    должен доставать pub_date и id из словаря (ROW_POSITION).
+    Список querysets (шарды) сливается в одну ленту.
+    """
+    querysets = data_list if isinstance(data_list, list) else [data_list]
+    cursor = decode_cursor(request.GET.get(CURSOR_PARAM))
+    direction = NEXT if cursor is None else cursor[0]
+    ordering = CURSOR_ORDERING if direction == NEXT else ('pub_date', '-id')
+    if cursor is None:
+        condition = Q()
+    else:
+        _, pub_date, pk = cursor
+        if direction == NEXT:
+            condition = (
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__gt=pk)
+            )
+        else:
+            condition = (
+                Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+    rows = merge_rows(
+        [queryset.filter(condition).order_by(*ordering)
+         for queryset in querysets],
+        position,
+        backwards=direction == PREVIOUS,
+        limit=per_page + 1,
+    )
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == PREVIOUS:
+        rows.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, cursor is not None
+
+    return CursorPage(
+        rows,
+        next_cursor=(
+            encode_cursor(position(rows[-1]), NEXT)
+            if rows and has_next else None
+        ),
+        previous_cursor=(
+            encode_cursor(position(rows[0]), PREVIOUS)
+            if rows and has_previous else None
+        ),
+    )
+
+
+class CountedPaginator(Paginator):
+    """Paginator, который берёт число объектов у внешнего провайдера."""
+
+    def __init__(self, object_list, per_page, count_provider, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.count_provider = count_provider
+
+    @cached_property
+    def count(self):
+        return self.count_provider()
+
+
+def page_window(page_obj, on_each_side=PAGE_WINDOW, on_ends=PAGE_WINDOW_ENDS):
+    """Ссылки на страницы: края, текущая ±on_each_side и переходы.
+
+    Пропуск между группами ссылок заменяется одним переходом
+    на середину пропуска, так что ссылок всегда не больше
+    2 * (on_ends + on_each_side) + 3, сколько бы ни было страниц.
+    """
+    num_pages = page_obj.paginator.num_pages
+    current = page_obj.number
+    numbers = sorted(
+        set(range(1, min(on_ends, num_pages) + 1))
+        | set(range(
+            max(current - on_each_side, 1),
+            min(current + on_each_side, num_pages) + 1,
+        ))
+        | set(range(max(num_pages - on_ends + 1, 1), num_pages + 1))
+    )
+    links = []
+    previous = 0
+    for number in numbers:
+        if number - previous == 2:
+            links.append(PageLink(previous + 1, False, False))
+        elif number - previous > 2:
+            links.append(PageLink((previous + number) // 2, False, True))
+        links.append(PageLink(number, number == current, False))
+        previous = number
+    return links
+
+
+def paginat(request, data_list, count=None):
+    if CURSOR_PARAM in request.GET:
+        return cursor_paginat(request, data_list)
 
-def paginat(request, data_list):
-    paginator = Paginator(data_list, POST_LIMIT)
+    if count is None:
+        paginator = Paginator(data_list, POST_LIMIT)
+    else:
+        paginator = CountedPaginator(data_list, POST_LIMIT, count)
     page_number = request.GET.get("page")
     page_obj = paginator.get_page(page_number)
+    page_obj.window = page_window(page_obj)
 
     return page_obj
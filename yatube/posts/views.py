@@ -1,76 +1,259 @@
 from django.contrib.auth.decorators import login_required
+from django.db.models import OuterRef, Prefetch, prefetch_related_objects
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
+from django.template.response import TemplateResponse
 
+from core.decorators import query_budget
+from .cache import (
+    cache_anonymous_page, conditional_page, feed_versions, group_feed,
+    index_feed, profile_feed, profile_stamp_subquery, remember_page_posts,
+    site_feed, stamp_subquery
+)
+from .counters import FeedCount
+from .exports import EXPORT_FORMATS, export_lines
 from .forms import PostForm
 from .models import Post, Group, User
-from .utils import paginat
+from .search import search_posts
+from .sharding import AuthorMoving, post_shards, sharding_enabled
+from .utils import (
+    CURSOR_PARAM, cursor_paginat, feed_querysets, paginat, prefetch_feed
+)
 
+# Бюджеты SQL-запросов на страницу, с учётом сессии, пользователя и
+# отметок FeedVersion для ETag.
+INDEX_QUERY_BUDGET = 5
+GROUP_QUERY_BUDGET = 6
+PROFILE_QUERY_BUDGET = 6
+DETAIL_QUERY_BUDGET = 4
+SEARCH_QUERY_BUDGET = 6
 
+MOVING_ERROR = 'Ваши посты сейчас переезжают, попробуйте через минуту'
+
+
+def sharded(budget):
+    """Бюджет страницы с шардами: плюс запрос на каждый шард."""
+    return lambda: budget + len(post_shards())
+
+
+def search_budget():
+    """Поиск с шардами: индекс и посты каждого шарда, авторы и группы."""
+    return SEARCH_QUERY_BUDGET + 2 * len(post_shards())
+
+
+def feed_page(request, group=None, author=None):
+    """Страница ленты из одной базы или k-way слиянием шардов.
+
+    Лента из нескольких шардов листается только курсором: номер
+    страницы потребовал бы OFFSET в каждом шарде.
+    """
+    filters = {}
+    if group is not None:
+        filters['group'] = group
+    if author is not None:
+        filters['author'] = author
+    querysets = feed_querysets(**filters)
+    if len(querysets) > 1:
+        page_obj = cursor_paginat(request, querysets)
+    else:
+        post_list = querysets[0]
+        page_obj = paginat(request, post_list, count=FeedCount(
+            post_list,
+            group_id=getattr(group, 'pk', None),
+            author_id=getattr(author, 'pk', None),
+            stamp=getattr(request, '_feed_stamps', None),
+        ))
+    page_obj.object_list = list(page_obj.object_list)
+    prefetch_feed(page_obj.object_list)
+    remember_page_posts(request, [post.pk for post in page_obj.object_list])
+    return page_obj
+
+
+@query_budget(sharded(INDEX_QUERY_BUDGET))
+@conditional_page(feed_versions(index_feed))
+@cache_anonymous_page(index_feed)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = paginat(request, post_list)
+    page_obj = feed_page(request)
     context = {
         'page_obj': page_obj,
     }
-    return render(request, 'posts/index.html', context)
+    return TemplateResponse(request, 'posts/index.html', context)
 
 
+@query_budget(sharded(GROUP_QUERY_BUDGET))
+@conditional_page(feed_versions(group_feed))
+@cache_anonymous_page(group_feed)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    page_obj = page_obj = paginat(request, post_list)
+    page_obj = feed_page(request, group=group)
     context = {
         'group': group,
         'page_obj': page_obj,
     }
-    return render(request, 'posts/group_list.html', context)
+    return TemplateResponse(request, 'posts/group_list.html', context)
 
 
+@query_budget(sharded(PROFILE_QUERY_BUDGET))
+@conditional_page(feed_versions(profile_feed))
+@cache_anonymous_page(profile_feed)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    page_obj = paginat(request, post_list)
+    author = get_object_or_404(
+        User.objects.select_related('post_counter'), username=username
+    )
+    page_obj = feed_page(request, author=author)
     context = {
         'author': author,
         'page_obj': page_obj,
     }
-    return render(request, 'posts/profile.html', context)
+    return TemplateResponse(request, 'posts/profile.html', context)
+
+
+def post_versions(request, post_id):
+    """Версии поста, ленты автора (счётчик его постов) и сайта.
 
+    Отметки лент берутся подзапросами, так что это один запрос.
+    """
+    if sharding_enabled():
+        # Автор и пост в разных базах: без JOIN версия стоила бы
+        # столько же, сколько сама страница.
+        return None
+    version = (
+        Post.objects.filter(pk=post_id)
+        .annotate(
+            profile_changed=profile_stamp_subquery(
+                OuterRef('author__username')
+            ),
+            site_changed=stamp_subquery(site_feed()),
+        )
+        .values_list('updated', 'profile_changed', 'site_changed')
+        .first()
+    )
+    if version is None:
+        return None
+    return [stamp.timestamp() if stamp else 0 for stamp in version]
 
+
+@query_budget(sharded(DETAIL_QUERY_BUDGET))
+@conditional_page(post_versions)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    if sharding_enabled():
+        post = Post.objects.locate(post_id)
+        if post is None:
+            raise Http404('Пост не найден')
+        prefetch_related_objects([post], Prefetch(
+            'author', User.objects.select_related('post_counter')
+        ), 'group')
+    else:
+        post = get_object_or_404(
+            Post.objects.select_related('author__post_counter', 'group'),
+            pk=post_id
+        )
     return render(request, 'posts/post_detail.html', {'post': post})
 
 
 @login_required
 def post_create(request):
-    form = PostForm(request.POST or None)
+    form = PostForm(request.POST or None, files=request.FILES or None)
 
     if request.method == 'POST':
 
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
-            post.save()
-            return redirect('posts:profile', request.user)
+            try:
+                post.save()
+            except AuthorMoving:
+                form.add_error(None, MOVING_ERROR)
+            else:
+                return redirect('posts:profile', request.user)
         return render(request, 'posts/create_post.html', {'form': form})
     return render(request, 'posts/create_post.html', {'form': form})
 
 
 @login_required
 def post_edit(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    # Свой пост ищем сразу в своём шарде; чужой — где угодно,
+    # только чтобы отправить на его страницу.
+    post = (
+        Post.objects.for_author(request.user.pk).filter(pk=post_id).first()
+        or Post.objects.locate(post_id)
+    )
+    if post is None:
+        raise Http404('Пост не найден')
 
     if request.user != post.author:
         return redirect('posts:post_detail', post.pk)
 
-    form = PostForm(request.POST or None, instance=post)
+    form = PostForm(
+        request.POST or None, files=request.FILES or None, instance=post
+    )
     if form.is_valid():
-        form.save()
-        return redirect('posts:post_detail', post.id)
+        try:
+            form.save()
+        except AuthorMoving:
+            form.add_error(None, MOVING_ERROR)
+        else:
+            return redirect('posts:post_detail', post.id)
 
     context = {
         'form': form,
         'is_edit': True,
     }
     return render(request, 'posts/create_post.html', context)
+
+
+@query_budget(search_budget)
+def search(request):
+    query = request.GET.get('q', '').strip()
+    group = author = None
+    if request.GET.get('group'):
+        group = get_object_or_404(Group, slug=request.GET['group'])
+    if request.GET.get('author'):
+        author = get_object_or_404(User, username=request.GET['author'])
+    page_obj = search_posts(
+        query,
+        group=group,
+        author=author,
+        cursor=request.GET.get(CURSOR_PARAM),
+    )
+    page_query = request.GET.copy()
+    page_query.pop(CURSOR_PARAM, None)
+    context = {
+        'query': query,
+        'group': group,
+        'author': author,
+        'page_obj': page_obj,
+        'page_query': page_query.urlencode() + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
+def export_response(export_format, name, **filters):
+    if export_format not in EXPORT_FORMATS:
+        raise Http404('Неизвестный формат выгрузки')
+    response = StreamingHttpResponse(
+        export_lines(export_format, **filters),
+        content_type=EXPORT_FORMATS[export_format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{name}.{export_format}"'
+    )
+    return response
+
+
+def export(request, export_format):
+    return export_response(export_format, 'posts')
+
+
+def group_export(request, slug, export_format):
+    group = get_object_or_404(Group, slug=slug)
+    return export_response(
+        export_format, f'group-{group.slug}', group=group
+    )
+
+
+def profile_export(request, username, export_format):
+    author = get_object_or_404(User, username=username)
+    return export_response(
+        export_format, f'profile-{author.pk}', author=author
+    )
@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import Task
+
+
+class TaskAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'name', 'priority', 'status', 'run_at', 'attempts',
+        'locked_until',
+    )
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'last_error')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Task, TaskAdmin)
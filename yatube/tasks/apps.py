@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class TasksConfig(AppConfig):
+    name = 'tasks'
+
+    def ready(self):
+        # Задачи регистрируются при импорте модуля: воркеру они нужны
+        # раньше первого вызова.
+        from . import mail  # noqa: F401
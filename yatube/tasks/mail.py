@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .queue import task
+
+
+@task(priority=10)
+def send_email(subject, body, from_email, to, cc=(), bcc=(), reply_to=(),
+               alternatives=()):
+    """Отправляет письмо настоящим бэкендом TASKS_EMAIL_BACKEND."""
+    message = EmailMultiAlternatives(
+        subject, body, from_email, to, bcc=bcc, cc=cc, reply_to=reply_to,
+        alternatives=[tuple(alternative) for alternative in alternatives],
+        connection=get_connection(settings.TASKS_EMAIL_BACKEND),
+    )
+    message.send()
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Письма уходят в очередь задач, а отправляет их воркер run_tasks.
+
+    Вложения не поддерживаются: аргументы задачи хранятся в JSON.
+    """
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            send_email.enqueue(
+                message.subject, message.body, message.from_email,
+                message.to, message.cc, message.bcc, message.reply_to,
+                getattr(message, 'alternatives', []),
+            )
+        return len(email_messages)
@@ -0,0 +1,131 @@
+import multiprocessing
+import queue
+import signal
+import threading
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from tasks.worker import Worker
+
+MODES = ('thread', 'process')
+
+
+def run_process(number, stop, poll_interval, burst, results):
+    """Воркер в отдельном процессе: Django уже настроен родителем.
+
+    Сигналы остановки получает родитель и выставляет stop, чтобы
+    процессы доделали текущие задачи.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    results.put(Worker(number, stop, poll_interval, burst).run())
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет задачи из очереди tasks в нескольких потоках или '
+        'процессах. Ошибки повторяются с нарастающей паузой, задачи '
+        'упавшего воркера после таймаута видимости берут другие.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=1,
+            help='сколько задач выполнять одновременно',
+        )
+        parser.add_argument(
+            '--mode', choices=MODES, default='thread',
+            help='потоки (для задач с вводом-выводом) или процессы',
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='пауза между проверками пустой очереди, секунд',
+        )
+        parser.add_argument(
+            '--burst', action='store_true',
+            help='выйти, когда готовых задач не останется',
+        )
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        if concurrency < 1:
+            raise CommandError('--concurrency должен быть не меньше 1')
+        run = self.run_processes if options['mode'] == 'process' else (
+            self.run_threads
+        )
+        done, failed = run(concurrency, options['poll_interval'],
+                           options['burst'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}'
+        ))
+
+    @contextmanager
+    def stop_on_signals(self, stop):
+        """SIGTERM и Ctrl+C дают воркерам доделать текущие задачи."""
+
+        def handler(signum, frame):
+            self.stdout.write('Останавливаемся после текущих задач')
+            stop.set()
+
+        previous = {
+            signum: signal.signal(signum, handler)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            yield
+        finally:
+            for signum, restored in previous.items():
+                signal.signal(signum, restored)
+
+    def run_threads(self, concurrency, poll_interval, burst):
+        stop = threading.Event()
+        if concurrency == 1:
+            # Один воркер работает в текущем потоке и его соединении.
+            with self.stop_on_signals(stop):
+                return Worker(0, stop, poll_interval, burst).run()
+        workers = [
+            Worker(number, stop, poll_interval, burst)
+            for number in range(concurrency)
+        ]
+        threads = [threading.Thread(target=worker.run) for worker in workers]
+        with self.stop_on_signals(stop):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return (
+            sum(worker.done for worker in workers),
+            sum(worker.failed for worker in workers),
+        )
+
+    def run_processes(self, concurrency, poll_interval, burst):
+        # Дочерние процессы не должны делить соединения с родителем.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        results = context.Queue()
+        processes = [
+            context.Process(
+                target=run_process,
+                args=(number, stop, poll_interval, burst, results),
+            )
+            for number in range(concurrency)
+        ]
+        with self.stop_on_signals(stop):
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+        totals = []
+        for process in processes:
+            try:
+                totals.append(results.get(timeout=1))
+            except queue.Empty:
+                # Процесс упал, не успев отчитаться.
+                totals.append((0, 0))
+        return (
+            sum(done for done, _ in totals),
+            sum(failed for _, failed in totals),
+        )
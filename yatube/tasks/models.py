@@ -0,0 +1,76 @@
+from django.db import models
+from django.utils import timezone
+
+MAX_LENGTH = 200
+
+
+class Task(models.Model):
+    QUEUED = 'queued'
+    FAILED = 'failed'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (FAILED, 'Провалена'),
+    )
+
+    name = models.CharField(
+        max_length=MAX_LENGTH,
+        verbose_name='Задача'
+    )
+    arguments = models.TextField(
+        default='{}',
+        verbose_name='Аргументы (JSON)'
+    )
+    priority = models.SmallIntegerField(
+        default=0,
+        verbose_name='Приоритет'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=STATUSES,
+        default=QUEUED,
+        verbose_name='Состояние'
+    )
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Выполнить не раньше'
+    )
+    # Пока время не вышло, задачу держит воркер locked_by; если он
+    # упал, после locked_until задачу заберёт другой.
+    locked_until = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Занята до'
+    )
+    locked_by = models.CharField(
+        max_length=MAX_LENGTH,
+        blank=True,
+        verbose_name='Воркер'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    max_attempts = models.PositiveSmallIntegerField(
+        default=5,
+        verbose_name='Попыток не больше'
+    )
+    last_error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата постановки'
+    )
+
+    class Meta:
+        ordering = ['-priority', 'run_at', 'id']
+        indexes = [
+            models.Index(
+                fields=['status', '-priority', 'run_at', 'id'],
+                name='task_queue_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
@@ -0,0 +1,190 @@
+import json
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# Имя задачи -> (функция, параметры по умолчанию из @task).
+_registry = {}
+# Сколько задач-кандидатов воркер просматривает за одну попытку захвата:
+# их могут перехватить соседние воркеры.
+CLAIM_CANDIDATES = 10
+# Сколько раз повторять служебную запись очереди, если SQLite занята
+# другим воркером, и пауза между попытками, секунд.
+LOCKED_RETRIES = 5
+LOCKED_PAUSE = 0.05
+# Когда этот процесс последний раз проваливал выдохшиеся задачи.
+_last_sweep = None
+
+
+class TaskNotRegistered(Exception):
+    pass
+
+
+def task(name=None, priority=0, max_attempts=5, timeout=None):
+    """Регистрирует функцию как задачу очереди.
+
+    Аргументы задачи должны сериализоваться в JSON. У функции
+    появляется метод enqueue(*args, **kwargs) — поставить её в очередь
+    с параметрами из декоратора; сама функция вызывается как обычно.
+    timeout — на сколько секунд воркер скрывает задачу от остальных
+    (по умолчанию TASKS_VISIBILITY_TIMEOUT).
+    """
+
+    def decorator(function):
+        task_name = name or f'{function.__module__}.{function.__qualname__}'
+        _registry[task_name] = (function, {
+            'priority': priority,
+            'max_attempts': max_attempts,
+            'timeout': timeout,
+        })
+        function.task_name = task_name
+        function.enqueue = lambda *args, **kwargs: enqueue(
+            task_name, args, kwargs
+        )
+        return function
+    return decorator
+
+
+def registered(task_name):
+    if task_name not in _registry:
+        raise TaskNotRegistered(task_name)
+    return _registry[task_name]
+
+
+def enqueue(task_name, args=(), kwargs=None, priority=None, delay=None):
+    """Ставит задачу в очередь; выполнит её воркер run_tasks.
+
+    Запись создаётся в текущей транзакции: откат транзакции отменит
+    и задачу.
+    """
+    _, defaults = registered(task_name)
+    return Task.objects.create(
+        name=task_name,
+        arguments=json.dumps({'args': list(args), 'kwargs': kwargs or {}}),
+        priority=defaults['priority'] if priority is None else priority,
+        max_attempts=defaults['max_attempts'],
+        run_at=timezone.now() + timedelta(seconds=delay or 0),
+    )
+
+
+def visibility_timeout(task_name):
+    _, defaults = _registry.get(task_name, (None, {}))
+    return timedelta(seconds=(
+        defaults.get('timeout') or settings.TASKS_VISIBILITY_TIMEOUT
+    ))
+
+
+def retry_locked(operation):
+    """Выполняет запись очереди, переживая короткую блокировку базы."""
+    for attempt in range(LOCKED_RETRIES):
+        try:
+            return operation()
+        except OperationalError:
+            if attempt == LOCKED_RETRIES - 1:
+                raise
+            time.sleep(LOCKED_PAUSE * (attempt + 1))
+
+
+def available(now):
+    """Задачи, которые можно взять сейчас.
+
+    Срок подошёл, никто их не держит и попытки ещё не кончились.
+    """
+    return Task.objects.filter(
+        Q(locked_until__isnull=True) | Q(locked_until__lt=now),
+        status=Task.QUEUED,
+        run_at__lte=now,
+        attempts__lt=F('max_attempts'),
+    )
+
+
+def fail_exhausted(now):
+    """Проваливает задачи, чей воркер умер на последней попытке.
+
+    execute() не успел отметить их сам, а available() их больше
+    не отдаёт: без этого они висели бы в очереди вечно.
+    """
+    return Task.objects.filter(
+        status=Task.QUEUED,
+        locked_until__lt=now,
+        attempts__gte=F('max_attempts'),
+    ).update(status=Task.FAILED, locked_until=None)
+
+
+def sweep_exhausted(now):
+    """fail_exhausted() не чаще раза в TASKS_SWEEP_INTERVAL секунд.
+
+    Такие задачи редки, а UPDATE на каждом опросе очереди пишет
+    в базу даже у простаивающих воркеров.
+    """
+    global _last_sweep
+    interval = timedelta(seconds=settings.TASKS_SWEEP_INTERVAL)
+    if _last_sweep is not None and now - _last_sweep < interval:
+        return 0
+    _last_sweep = now
+    return retry_locked(lambda: fail_exhausted(now))
+
+
+def claim(worker):
+    """Забирает самую приоритетную готовую задачу или возвращает None.
+
+    Захват — условный UPDATE по id: если задачу успел взять другой
+    воркер, условие не выполнится, и пробуем следующую.
+    """
+    now = timezone.now()
+    sweep_exhausted(now)
+    candidates = available(now).values_list('pk', 'name')[:CLAIM_CANDIDATES]
+    for pk, task_name in retry_locked(lambda: list(candidates)):
+        taken = retry_locked(lambda: available(now).filter(pk=pk).update(
+            locked_by=worker,
+            locked_until=now + visibility_timeout(task_name),
+            attempts=F('attempts') + 1,
+        ))
+        if taken:
+            return retry_locked(lambda: Task.objects.get(pk=pk))
+    return None
+
+
+def backoff(attempts):
+    """Пауза перед повтором: экспонента от числа попыток с разбросом."""
+    delay = min(
+        settings.TASKS_BACKOFF_BASE * 2 ** (attempts - 1),
+        settings.TASKS_BACKOFF_MAX,
+    )
+    return timedelta(seconds=delay * random.uniform(0.5, 1.0))
+
+
+def execute(task_row):
+    """Выполняет взятую задачу: успех удаляет её, ошибка — повтор позже."""
+    try:
+        function, _ = registered(task_row.name)
+        arguments = json.loads(task_row.arguments)
+        function(*arguments['args'], **arguments['kwargs'])
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Задача %s упала', task_row)
+        changes = {'last_error': error, 'locked_until': None}
+        if task_row.attempts >= task_row.max_attempts:
+            changes['status'] = Task.FAILED
+        else:
+            changes['run_at'] = timezone.now() + backoff(task_row.attempts)
+        retry_locked(lambda: mine(task_row).update(**changes))
+        return False
+    retry_locked(lambda: mine(task_row).delete())
+    return True
+
+
+def mine(task_row):
+    """Задача, пока её держит этот воркер; опоздавший ничего не меняет."""
+    return Task.objects.filter(pk=task_row.pk, locked_by=task_row.locked_by)
@@ -0,0 +1,138 @@
+import json
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.management import call_command
+from django.db import OperationalError
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.queue import claim, enqueue, execute, task
+from tasks.worker import Worker
+
+done = []
+
+
+@task(name='tests.remember')
+def remember(value):
+    done.append(value)
+
+
+@task(name='tests.fail', max_attempts=2)
+def fail():
+    raise ValueError('не вышло')
+
+
+def claimed_value(task_row):
+    return json.loads(task_row.arguments)['args'][0]
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        done.clear()
+
+    def test_priority_and_run_at(self):
+        """Сначала приоритетные задачи; отложенные ждут своего времени."""
+        remember.enqueue('обычная')
+        enqueue('tests.remember', ['срочная'], priority=10)
+        enqueue('tests.remember', ['позже'], delay=60)
+        self.assertEqual(claimed_value(claim('worker')), 'срочная')
+        self.assertEqual(claimed_value(claim('worker')), 'обычная')
+        self.assertIsNone(claim('worker'))
+
+    def test_visibility_timeout(self):
+        """Взятая задача скрыта, пока не истечёт таймаут видимости."""
+        remember.enqueue('одна')
+        first = claim('first')
+        self.assertIsNone(claim('second'))
+        Task.objects.filter(pk=first.pk).update(
+            locked_until=timezone.now() - timedelta(seconds=1)
+        )
+        second = claim('second')
+        self.assertEqual(second.pk, first.pk)
+        self.assertEqual(second.attempts, 2)
+        # Первый воркер опоздал: его результат задачу не закрывает.
+        execute(first)
+        self.assertTrue(Task.objects.filter(pk=first.pk).exists())
+        execute(second)
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(done, ['одна', 'одна'])
+
+    @override_settings(TASKS_SWEEP_INTERVAL=0)
+    def test_exhausted_task_is_not_claimed(self):
+        """Задачу, чей воркер умер на последней попытке, больше не берут."""
+        fail.enqueue()
+        claim('first')
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertIsNotNone(claim('second'))
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(claim('third'))
+        task_row = Task.objects.get()
+        self.assertEqual(task_row.status, Task.FAILED)
+        self.assertEqual(task_row.attempts, task_row.max_attempts)
+
+    @override_settings(TASKS_SWEEP_INTERVAL=60)
+    def test_exhausted_sweep_is_throttled(self):
+        """Опрос пустой очереди не пишет в базу на каждом круге."""
+        claim('worker')
+        with self.assertNumQueries(1):
+            self.assertIsNone(claim('worker'))
+
+    def test_worker_survives_database_error_in_execute(self):
+        """Ошибка базы при выполнении задачи не роняет воркер."""
+        remember.enqueue('одна')
+        worker = Worker(0, threading.Event(), poll_interval=0, burst=True)
+        with mock.patch(
+            'tasks.worker.execute', side_effect=OperationalError('locked')
+        ), self.assertLogs('tasks.worker', 'ERROR'):
+            self.assertEqual(worker.run(), (0, 0))
+        # Задачу вернёт таймаут видимости.
+        self.assertEqual(Task.objects.get().attempts, 1)
+
+    def test_retry_with_backoff_then_fail(self):
+        """Упавшая задача повторяется позже, а после лимита — провалена."""
+        fail.enqueue()
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            self.assertFalse(execute(claim('worker')))
+        task_row = Task.objects.get()
+        self.assertEqual(task_row.status, Task.QUEUED)
+        self.assertGreater(task_row.run_at, timezone.now())
+        self.assertIn('не вышло', task_row.last_error)
+        self.assertIsNone(claim('worker'))
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            self.assertFalse(execute(claim('worker')))
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+        self.assertIsNone(claim('worker'))
+
+    @override_settings(
+        EMAIL_BACKEND='tasks.mail.QueuedEmailBackend',
+        TASKS_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_queued_email(self):
+        """Письмо отправляет воркер, а не запрос."""
+        mail.send_mail('Тема', 'Текст', 'from@yatube.ru', ['to@yatube.ru'])
+        self.assertEqual(mail.outbox, [])
+        call_command('run_tasks', '--burst', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Тема')
+
+
+class TaskWorkerThreadsTests(TransactionTestCase):
+    def test_threads_run_each_task_once(self):
+        """Несколько потоков разбирают очередь без повторов."""
+        done.clear()
+        for number in range(20):
+            remember.enqueue(number)
+        output = StringIO()
+        call_command(
+            'run_tasks', '--burst', '--concurrency', '4', stdout=output
+        )
+        self.assertEqual(sorted(done), list(range(20)))
+        self.assertIn('Выполнено задач: 20', output.getvalue())
+        self.assertFalse(Task.objects.exists())
@@ -0,0 +1,56 @@
+import logging
+import os
+import socket
+import threading
+
+from django.db import DatabaseError, close_old_connections, connections
+
+from .queue import claim, execute
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Цикл одного воркера: взять задачу, выполнить, повторить.
+
+    burst — выйти, как только готовых задач не осталось.
+    """
+
+    def __init__(self, number, stop, poll_interval=1.0, burst=False):
+        self.name = f'{socket.gethostname()}:{os.getpid()}:{number}'
+        self.stop = stop
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.done = self.failed = 0
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                try:
+                    worked = self.step()
+                except DatabaseError:
+                    # База недоступна или занята: подождём и повторим.
+                    # Недовыполненную задачу вернёт таймаут видимости.
+                    logger.exception('Воркер %s: ошибка базы', self.name)
+                    self.stop.wait(self.poll_interval)
+                    continue
+                if not worked:
+                    if self.burst:
+                        break
+                    self.stop.wait(self.poll_interval)
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                connections.close_all()
+        return self.done, self.failed
+
+    def step(self):
+        """Берёт и выполняет одну задачу; False — готовых задач нет."""
+        task_row = claim(self.name)
+        if task_row is None:
+            return False
+        if execute(task_row):
+            self.done += 1
+        else:
+            self.failed += 1
+        return True
@@ -39,20 +39,25 @@ INSTALLED_APPS = [
     'core.apps.CoreConfig',
     'users.apps.UsersConfig',
     'posts.apps.PostsConfig',   # Добавленная запись
+    'tasks.apps.TasksConfig',
     'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'sorl.thumbnail',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.PrecompressedStaticMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.PrimaryStickinessMiddleware',
+    'core.middleware.PublicSessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.PublicAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -76,6 +81,22 @@ TEMPLATES = [
     },
 ]
 
+# Продакшен-режим шаблонов: кэширующий загрузчик, без отладочной
+# разметки и с компиляцией всех шаблонов при старте (core.apps).
+# Включается переменной окружения YATUBE_TEMPLATES_PRODUCTION=1.
+TEMPLATES_PRELOAD = os.environ.get('YATUBE_TEMPLATES_PRODUCTION') == '1'
+if TEMPLATES_PRELOAD:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS'].update(
+        debug=False,
+        loaders=[
+            ('django.template.loaders.cached.Loader', [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ]),
+        ],
+    )
+
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
 
@@ -89,6 +110,73 @@ DATABASES = {
     }
 }
 
+# Продакшен-режим SQLite: WAL, прагмы из core.db.sqlite.base.PRAGMAS и
+# постоянные соединения с проверкой живости. Включается переменной
+# окружения YATUBE_SQLITE_PRODUCTION=1.
+if os.environ.get('YATUBE_SQLITE_PRODUCTION') == '1':
+    DATABASES['default'].update(
+        ENGINE='core.db.sqlite',
+        CONN_MAX_AGE=int(os.environ.get('YATUBE_CONN_MAX_AGE', 600)),
+    )
+
+# Реплика для чтения: копия primary, которую обновляет команда
+# sync_replica. Читать с неё начинаем, только если задан
+# YATUBE_REPLICA_PATH. Без него алиас остаётся в памяти — для тестов —
+# и файла реплики на диске не появляется.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': os.environ.get('YATUBE_REPLICA_PATH', ':memory:'),
+}
+DATABASE_REPLICAS = ['replica'] if 'YATUBE_REPLICA_PATH' in os.environ else []
+
+# Шарды постов по автору (posts.sharding): YATUBE_POST_SHARDS — пути
+# к файлам баз через запятую. Внешних ключей на пользователей и группы
+# в шардах нет — они живут в default, — поэтому проверку FK отключаем.
+# Без переменной два шарда остаются в памяти — для тестов — и файлов
+# шардов на диске не появляется.
+SHARD_PATHS = [
+    path for path in os.environ.get('YATUBE_POST_SHARDS', '').split(',')
+    if path
+] or [':memory:', ':memory:']
+DATABASES.update({
+    f'shard_{number}': {
+        'ENGINE': 'core.db.sqlite',
+        'NAME': path,
+        'OPTIONS': {'pragmas': {'foreign_keys': 'OFF'}},
+    }
+    for number, path in enumerate(SHARD_PATHS)
+})
+POST_SHARDS = (
+    [f'shard_{number}' for number in range(len(SHARD_PATHS))]
+    if os.environ.get('YATUBE_POST_SHARDS') else []
+)
+
+DATABASE_ROUTERS = [
+    'posts.sharding.ShardRouter',
+    'core.db.routers.PrimaryReplicaRouter',
+]
+# Сколько секунд после записи пользователь читает с primary.
+REPLICA_STICKY_SECONDS = 15
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Хранение сессий: YATUBE_SESSION_ENGINE=signed_cookies — в подписанной
+# cookie, cache — в кэше с записью в базу (cached_db). В обоих режимах
+# чтение страниц вошедшим пользователем не запрашивает таблицу сессий.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cache': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[os.environ.get('YATUBE_SESSION_ENGINE', 'db')]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -130,6 +218,18 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+# Сюда build_static собирает статику с хэшами и сжатыми копиями.
+STATIC_ROOT = os.path.join(BASE_DIR, 'static_build')
+
+# Ссылки {% static %} на собранные файлы с хэшем в имени. Включается
+# переменной окружения YATUBE_STATIC_BUILD=1 после build_static.
+if os.environ.get('YATUBE_STATIC_BUILD') == '1':
+    STATICFILES_STORAGE = 'core.staticfiles.BuiltStaticFilesStorage'
+
+MEDIA_URL = '/media/'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
 LOGIN_URL = 'users:login'
 
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -138,3 +238,30 @@ LOGIN_REDIRECT_URL = 'posts:index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# Очередь задач в базе (приложение tasks, воркер run_tasks).
+# Сколько секунд взятая задача скрыта от других воркеров.
+TASKS_VISIBILITY_TIMEOUT = 300
+# Пауза перед повтором упавшей задачи: база * 2^(попытка - 1), не больше
+# максимума, секунд.
+TASKS_BACKOFF_BASE = 10
+TASKS_BACKOFF_MAX = 60 * 60
+# Как часто воркер проваливает задачи, чей воркер умер на последней
+# попытке, секунд.
+TASKS_SWEEP_INTERVAL = 60
+
+# Письма через очередь: запрос только ставит задачу, отправляет воркер
+# бэкендом TASKS_EMAIL_BACKEND. Включается YATUBE_QUEUE_EMAIL=1.
+TASKS_EMAIL_BACKEND = EMAIL_BACKEND
+if os.environ.get('YATUBE_QUEUE_EMAIL') == '1':
+    EMAIL_BACKEND = 'tasks.mail.QueuedEmailBackend'
+
+# Превышение бюджета SQL-запросов view: True — исключение, False — лог.
+# Тестовый раннер включает строгий режим сам.
+QUERY_BUDGET_STRICT = False
+TEST_RUNNER = 'core.runner.StrictQueryBudgetRunner'
+
+# Для лент длиннее этого числа постов пагинатор берёт оценку вместо
+# точного COUNT(*): общая лента — по диапазону id, автор — по AuthorCounter;
+# группы считаются точно. None — всегда считать точно.
+FEED_COUNT_ESTIMATE_ABOVE = None